@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 300.0  # seconds
+DEFAULT_NEGATIVE_TTL = 30.0  # seconds, for lookups that found nothing
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after a TTL.
+
+    Values of None are not stored; callers use None to mean "not cached".
+    Expired entries stay until evicted, for get_stale. Hit, miss, stale hit
+    and eviction counters are available through stats(). on_evict is called
+    with the key and value of each entry evicted to make room, e.g. to close
+    a connection pool.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for a key, counting the lookup as a hit or miss."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for a key without touching the counters."""
+        with self._lock:
+            return self._lookup(key)
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the value for a key even if it has expired.
+
+        For when the source of truth can't be reached and an old answer
+        beats none; counted separately as a stale hit.
+        """
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return None
+            self.stale_hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if value is None:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False))
+                self.evictions += 1
+        if self.on_evict is not None:
+            for evicted_key, (_, evicted_value) in evicted:
+                self.on_evict(evicted_key, evicted_value)
+
+    def values(self) -> List[Any]:
+        """Return every stored value, expired or not, least recently used first."""
+        with self._lock:
+            return [value for _, value in self._entries.values()]
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stale_hits = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _lookup(self, key: Hashable) -> Optional[Any]:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return value
@@ -0,0 +1,175 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .notion_api import get_async_client
+
+MAX_PAGE_SIZE = 100
+
+
+def plain_text(rich_text: List[Dict[str, Any]]) -> str:
+    return "".join(item.get("plain_text", "") for item in rich_text)
+
+
+def _user(user: Dict[str, Any]) -> Optional[str]:
+    return user.get("name") or user.get("id")
+
+
+def property_value(prop: Dict[str, Any]) -> Any:
+    """
+    Reduce a page property value to plain JSON: text, a number, a list...
+
+    Dates become "start" or "start/end", people their names, relations
+    their page IDs. Types without a simple form come back as None.
+    """
+    kind = prop.get("type")
+    value = prop.get(kind)
+    if value is None:
+        return None
+    if kind in ("title", "rich_text"):
+        return plain_text(value)
+    if kind in ("select", "status"):
+        return value.get("name")
+    if kind == "multi_select":
+        return [option.get("name") for option in value]
+    if kind == "date":
+        if value.get("end"):
+            return f"{value['start']}/{value['end']}"
+        return value.get("start")
+    if kind == "people":
+        return [_user(user) for user in value]
+    if kind in ("created_by", "last_edited_by"):
+        return _user(value)
+    if kind == "relation":
+        return [page.get("id") for page in value]
+    if kind == "files":
+        return [
+            (item.get(item.get("type")) or {}).get("url") or item.get("name")
+            for item in value
+        ]
+    if kind in ("formula", "rollup"):
+        inner = value.get("type")
+        if inner == "array":
+            return [property_value(item) for item in value.get("array", [])]
+        return property_value({"type": inner, inner: value.get(inner)})
+    if kind == "unique_id":
+        prefix = value.get("prefix")
+        return f"{prefix}-{value.get('number')}" if prefix else value.get("number")
+    if isinstance(value, (str, int, float, bool)):
+        # number, checkbox, url, email, phone_number and the timestamps
+        return value
+    return None
+
+
+def compact_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A database row as its ID and its properties' plain values."""
+    row = {"id": result["id"]}
+    for name, prop in (result.get("properties") or {}).items():
+        row[name] = property_value(prop)
+    return row
+
+
+async def property_ids(
+    token: str, database_id: str, names: List[str]
+) -> List[str]:
+    """
+    Look up the IDs Notion uses to select properties, by property name.
+
+    Raises:
+        RuntimeError: If the database can't be read or lacks a property
+    """
+    response = await get_async_client().get(f"databases/{database_id}", token)
+    if response["error"]:
+        raise RuntimeError(f"Reading database failed: {response['error']}")
+    schema = response["data"].get("properties", {})
+    if missing := [name for name in names if name not in schema]:
+        raise RuntimeError(
+            f"Unknown properties: {', '.join(missing)}. "
+            f"Available: {', '.join(schema)}"
+        )
+    return [schema[name]["id"] for name in names]
+
+
+class DatabaseQuery:
+    """
+    Streams a database's rows as compact dicts, following result cursors.
+
+    Each result page is requested while the previous one is being consumed,
+    and rows are not kept once yielded, so large databases pass through in
+    constant memory. Filters and sorts are Notion's own objects, passed
+    through as is. With `properties`, Notion is asked for only those
+    properties, which keeps responses small. Reading stops after
+    `max_rows` rows, and `truncated` records whether more were left.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        database_id: str,
+        filter: Optional[Dict[str, Any]] = None,
+        sorts: Optional[List[Dict[str, Any]]] = None,
+        properties: Optional[List[str]] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.token = token
+        self.database_id = database_id
+        self.filter = filter
+        self.sorts = sorts
+        self.properties = properties
+        self.max_rows = max_rows
+        self.count = 0
+        self.truncated = False
+
+    async def rows(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the matching rows in order.
+
+        Raises:
+            RuntimeError: If a query fails
+        """
+        client = get_async_client()
+        endpoint = f"databases/{self.database_id}/query"
+        params = None
+        if self.properties:
+            ids = await property_ids(self.token, self.database_id, self.properties)
+            params = {"filter_properties": ids}
+        body: Dict[str, Any] = {"page_size": MAX_PAGE_SIZE}
+        if self.max_rows is not None:
+            body["page_size"] = max(1, min(MAX_PAGE_SIZE, self.max_rows))
+        if self.filter:
+            body["filter"] = self.filter
+        if self.sorts:
+            body["sorts"] = self.sorts
+
+        def fetch(body: Dict[str, Any]) -> asyncio.Future:
+            return asyncio.ensure_future(
+                client.request("POST", endpoint, self.token, body, params)
+            )
+
+        request: Optional[asyncio.Future] = fetch(body)
+        try:
+            while request is not None:
+                response = await request
+                request = None
+                if response["error"]:
+                    raise RuntimeError(f"Database query failed: {response['error']}")
+
+                data = response["data"]
+                results = data.get("results", [])
+                more = bool(data.get("has_more") and data.get("next_cursor"))
+                if self.max_rows is not None:
+                    room = self.max_rows - self.count
+                    if len(results) > room or (more and len(results) == room):
+                        results, more, self.truncated = results[:room], False, True
+                if more:
+                    following = {**body, "start_cursor": data["next_cursor"]}
+                    if self.max_rows is not None:
+                        wanted = self.max_rows - self.count - len(results)
+                        following["page_size"] = min(MAX_PAGE_SIZE, wanted)
+                    request = fetch(following)
+
+                for result in results:
+                    self.count += 1
+                    yield compact_row(result)
+        finally:
+            if request is not None:
+                request.cancel()
@@ -0,0 +1,401 @@
+"""
+Import a directory of markdown files into Notion as a page hierarchy.
+
+Usage:
+    NOTION_TOKEN=... python -m arcade_notion.importer <directory> <parent page ID>
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .markdown_processor import iter_blocks, parse_markdown
+from .reader import fetch_children_async
+from .runner import run_sync
+from .types import NotionResult, UploadState
+from .updater import update_page_async
+from .uploader import confirm_request_async, upload_page_async
+
+IMPORT_CONCURRENCY = 4
+MARKDOWN_SUFFIXES = {".md", ".markdown"}
+# Files whose content becomes their directory's page instead of a page of their own
+INDEX_NAMES = ("index.md", "README.md")
+JOURNAL_NAME = ".notion-import.jsonl"
+
+
+class ImportJournal:
+    """
+    Append-only record of an import's progress, one JSON object per line.
+
+    A "start" line is written before a file's page is created. Then every
+    call its upload makes is written down as soon as it succeeds: the
+    page, the content hash, the planned request sent, the blocks uploaded
+    so far and the IDs of the blocks it created. A finished file gets a
+    final "done" line with the hash of the content it ended with.
+    Loading folds the lines back into one entry per file; a last line cut
+    short by a crash is ignored.
+    """
+
+    def __init__(self, path: Path, parent_id: str):
+        self.path = path
+        self.parent_id = parent_id
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._file = None
+
+    def load(self) -> "ImportJournal":
+        """
+        Read the progress recorded so far, if any.
+
+        Raises:
+            ValueError: If the journal belongs to an import under another parent
+        """
+        if not self.path.exists():
+            return self
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "parent" in record:
+                    if record["parent"] != self.parent_id:
+                        raise ValueError(
+                            f"{self.path} records an import under "
+                            f"{record['parent']}, not {self.parent_id}"
+                        )
+                    continue
+                entry = self.entries.setdefault(record["path"], {"created": {}})
+                entry["hash"] = record["hash"]
+                if record.get("start"):
+                    continue
+                entry["page"] = record["page"]
+                if record.get("done"):
+                    entry["done"] = True
+                    continue
+                entry.update(
+                    done=False,
+                    requests=record["request"] + 1,
+                    blocks=record["blocks"],
+                )
+                if record.get("created"):
+                    entry["created"][record["request"]] = record["created"]
+        return self
+
+    def state(self, path: str, digest: str) -> Optional[UploadState]:
+        """Where an earlier upload of this exact content stopped, if anywhere."""
+        entry = self.entries.get(path)
+        if entry is None or "page" not in entry or entry["done"]:
+            return None
+        if entry["hash"] != digest:
+            return None
+        return UploadState(
+            page_id=entry["page"],
+            requests=entry["requests"],
+            blocks=entry["blocks"],
+            created=entry["created"],
+        )
+
+    def start(self, path: str, digest: str) -> None:
+        self.entries[path] = {"created": {}, "hash": digest}
+        self._write({"path": path, "hash": digest, "start": True})
+
+    def record(self, path: str, digest: str, state: UploadState, index: int) -> None:
+        self._write(
+            {
+                "path": path,
+                "page": state.page_id,
+                "hash": digest,
+                "request": index,
+                "blocks": state.blocks,
+                "created": state.created.get(index),
+            }
+        )
+
+    def finish(self, path: str, digest: str, page_id: str) -> None:
+        self._write({"path": path, "page": page_id, "hash": digest, "done": True})
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            new = not self.path.exists()
+            self._file = self.path.open("a", encoding="utf-8")
+            if new:
+                self._file.write(json.dumps({"parent": self.parent_id}) + "\n")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+
+def scan_directory(directory: Path) -> Tuple[Optional[Path], List[Path], List[Path]]:
+    """
+    List what a directory contributes to the import.
+
+    Returns:
+        Its index file (if any), its other markdown files and its
+        subdirectories, sorted by name. Hidden entries are skipped.
+    """
+    index = None
+    files: List[Path] = []
+    directories: List[Path] = []
+    for entry in sorted(directory.iterdir(), key=lambda p: p.name.casefold()):
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            directories.append(entry)
+        elif entry.suffix.lower() in MARKDOWN_SUFFIXES:
+            if entry.name in INDEX_NAMES and index is None:
+                index = entry
+            else:
+                files.append(entry)
+    return index, files, directories
+
+
+class DirectoryImport:
+    """
+    Mirrors a directory tree as Notion pages: each markdown file becomes a
+    page titled after its name, and each subdirectory a page holding its
+    files and subdirectories, with its index.md or README.md as content.
+
+    Sibling pages are created concurrently, at most `concurrency` uploads
+    at a time, and every call is journaled (see ImportJournal). Run again
+    after an interruption, finished pages are skipped and partly uploaded
+    ones continue from the request they reached. A file edited since its
+    page was created is brought up to date by diffing instead (see
+    update_page_async), so running again also syncs later edits.
+
+    The one call that may have been in flight when the import stopped is
+    checked before resuming (see confirm_request_async); a page created
+    without its ID being journaled is looked for among its parent's
+    subpages. Either way, nothing is uploaded twice.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        root: Path,
+        parent_id: str,
+        journal: Optional[Path] = None,
+        concurrency: int = IMPORT_CONCURRENCY,
+    ):
+        self.token = token
+        self.root = root
+        self.journal = ImportJournal(journal or root / JOURNAL_NAME, parent_id)
+        self.parent_id = parent_id
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.counts = {"created": 0, "resumed": 0, "updated": 0, "skipped": 0}
+        # Pages the journal accounts for, never taken for a lost creation
+        self.claimed = set()
+        self.blocks = 0
+        self.failed: List[str] = []
+
+    async def run(self) -> NotionResult:
+        try:
+            await asyncio.to_thread(self.journal.load)
+            entries = self.journal.entries.values()
+            self.claimed = {entry["page"] for entry in entries if "page" in entry}
+            index, files, directories = await asyncio.to_thread(
+                scan_directory, self.root
+            )
+            # The root has no page of its own, so its index is an ordinary page
+            if index is not None:
+                files.insert(0, index)
+            await self._import_children(files, directories, self.parent_id)
+        finally:
+            self.journal.close()
+
+        pages = sum(self.counts.values())
+        message = (
+            f"Imported {pages} pages ({self.counts['skipped']} already done, "
+            f"{self.counts['resumed']} resumed, {self.counts['updated']} updated)"
+        )
+        if self.failed:
+            message += f"; {len(self.failed)} failed: {', '.join(self.failed[:5])}"
+        return NotionResult(
+            success=not self.failed,
+            message=message,
+            data={
+                **self.counts,
+                "blocks_uploaded": self.blocks,
+                "failed": self.failed,
+                "journal": str(self.journal.path),
+            },
+        )
+
+    async def _import_children(
+        self, files: List[Path], directories: List[Path], parent_id: str
+    ) -> None:
+        await asyncio.gather(
+            *(self._import_page(path, path, path.stem, parent_id) for path in files),
+            *(self._import_directory(path, parent_id) for path in directories),
+        )
+
+    async def _import_directory(self, directory: Path, parent_id: str) -> None:
+        index, files, directories = await asyncio.to_thread(scan_directory, directory)
+        page_id = await self._import_page(directory, index, directory.name, parent_id)
+        if page_id is not None:
+            await self._import_children(files, directories, page_id)
+
+    async def _find_lost_page(self, parent_id: str, title: str) -> Optional[str]:
+        """A subpage of the parent with this title that the journal lacks."""
+        async for results in fetch_children_async(self.token, parent_id):
+            for block in results:
+                if block["type"] != "child_page" or block["id"] in self.claimed:
+                    continue
+                if block["child_page"].get("title") == title:
+                    self.claimed.add(block["id"])
+                    return block["id"]
+        return None
+
+    async def _upload(
+        self, key: str, digest: str, content: str, title: str, parent_id: str
+    ) -> Tuple[str, NotionResult]:
+        """Create, finish or update a page; return what was done and the result."""
+        entry = self.journal.entries.get(key, {})
+        page_id = entry.get("page")
+        state = self.journal.state(key, digest)
+        if page_id is None and entry:
+            # Created last time, perhaps, with the response lost
+            if page_id := await self._find_lost_page(parent_id, title):
+                state = UploadState(page_id) if entry["hash"] == digest else None
+
+        if state is not None:
+            landed = await confirm_request_async(
+                self.token, iter_blocks(content), state
+            )
+            if landed:
+                self.journal.record(key, digest, state, state.requests - 1)
+            elif landed is None:
+                state = None
+
+        if state is None and page_id is not None:
+            blocks = await asyncio.to_thread(parse_markdown, content)
+            return "updated", await update_page_async(self.token, page_id, blocks)
+
+        kind = "resumed"
+        if state is None:
+            kind, state = "created", UploadState()
+            self.journal.start(key, digest)
+        title_property = {"title": [{"type": "text", "text": {"content": title}}]}
+        result = await upload_page_async(
+            self.token,
+            parent={"page_id": parent_id},
+            properties={"title": title_property},
+            blocks=iter_blocks(content),
+            state=state,
+            on_request=lambda state, index: self.journal.record(
+                key, digest, state, index
+            ),
+        )
+        if result.data and result.data.get("id"):
+            self.claimed.add(result.data["id"])
+        return kind, result
+
+    async def _import_page(
+        self, path: Path, source: Optional[Path], title: str, parent_id: str
+    ) -> Optional[str]:
+        """Create (or finish) the page for a file or directory; return its ID."""
+        key = path.relative_to(self.root).as_posix()
+        entry = self.journal.entries.get(key, {})
+
+        async with self.semaphore:
+            content = ""
+            if source is not None:
+                content = await asyncio.to_thread(source.read_text, encoding="utf-8")
+            digest = hashlib.sha1(content.encode()).hexdigest()
+            if entry.get("done") and entry["hash"] == digest:
+                self.counts["skipped"] += 1
+                return entry["page"]
+
+            try:
+                kind, result = await self._upload(
+                    key, digest, content, title, parent_id
+                )
+            except Exception as e:
+                kind, result = "failed", NotionResult(success=False, message=str(e))
+
+        if not result.success:
+            logger.error(f"Importing {key} failed: {result.message}")
+            self.failed.append(key)
+            return None
+
+        self.journal.finish(key, digest, result.data["id"])
+        self.counts[kind] += 1
+        self.blocks += result.data.get("blocks_uploaded", result.data.get("inserted"))
+        return result.data["id"]
+
+
+async def import_directory_async(
+    token: str,
+    root: str,
+    parent_id: str,
+    journal: Optional[str] = None,
+    concurrency: int = IMPORT_CONCURRENCY,
+) -> NotionResult:
+    """
+    Import a directory of markdown files under a Notion page, resumably.
+
+    Args:
+        token: Notion API token
+        root: Directory to import; its contents go directly under the parent
+        parent_id: ID of the page to import into
+        journal: Journal file path (default: .notion-import.jsonl in root)
+        concurrency: Maximum number of pages uploading at once
+
+    Returns:
+        NotionResult counting the pages created, resumed, updated and
+        skipped, and listing the paths that failed
+
+    Raises:
+        ValueError: If the journal records an import under another parent
+    """
+    return await DirectoryImport(
+        token,
+        Path(root),
+        parent_id,
+        Path(journal) if journal else None,
+        concurrency,
+    ).run()
+
+
+def import_directory(
+    token: str,
+    root: str,
+    parent_id: str,
+    journal: Optional[str] = None,
+    concurrency: int = IMPORT_CONCURRENCY,
+) -> NotionResult:
+    """Blocking wrapper around import_directory_async."""
+    return run_sync(
+        import_directory_async(token, root, parent_id, journal, concurrency)
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory")
+    parser.add_argument("parent_id", help="ID of the Notion page to import into")
+    parser.add_argument("--journal", help=f"default: <directory>/{JOURNAL_NAME}")
+    parser.add_argument("--concurrency", type=int, default=IMPORT_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    if not (token := os.environ.get("NOTION_TOKEN")):
+        parser.error("set NOTION_TOKEN to an integration token")
+    result = import_directory(
+        token, args.directory, args.parent_id, args.journal, args.concurrency
+    )
+    print(result.message)
+    return 0 if result.success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import AsyncIterator, List, Optional
+
+from loguru import logger
+
+from .matcher import normalize_title
+from .types import Page, ParentType
+
+DEFAULT_MAX_AGE = 300.0  # seconds an index may lag before lookups skip it
+DEFAULT_REBUILD_AGE = 86400.0  # seconds between full rebuilds that drop removed pages
+REFRESH_LEASE = 600.0  # seconds one process may hold the refresh lease
+LOOKUP_LIMIT = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    owner TEXT NOT NULL,
+    id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    norm_title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    parent_type TEXT,
+    parent_id TEXT,
+    url TEXT,
+    last_edited_time TEXT,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (owner, id)
+);
+CREATE INDEX IF NOT EXISTS pages_by_title ON pages (owner, norm_title);
+CREATE TABLE IF NOT EXISTS sync_state (
+    owner TEXT PRIMARY KEY,
+    synced_at REAL,
+    rebuilt_at REAL,
+    watermark TEXT,
+    lease_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+def owner_key(token: str) -> str:
+    """Identify a token's rows without storing the token itself."""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+class TitleIndex:
+    """
+    SQLite index of the pages and databases visible to each token.
+
+    The index is filled by paging through Notion's search endpoint and is
+    refreshed incrementally: search results come newest first, so a refresh
+    stops at the first page edited before the previous refresh. A full
+    rebuild every `rebuild_age` seconds drops pages that were deleted or
+    unshared. The file uses WAL mode and a refresh lease stored in the
+    database, so several worker processes can share one index file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_age: float = DEFAULT_MAX_AGE,
+        rebuild_age: float = DEFAULT_REBUILD_AGE,
+    ):
+        self.path = path
+        self.max_age = max_age
+        self.rebuild_age = rebuild_age
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def is_fresh(self, token: str) -> bool:
+        """Whether the token's index was refreshed within `max_age` seconds."""
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT synced_at FROM sync_state WHERE owner = ?",
+                (owner_key(token),),
+            ).fetchone()
+        if not (row and row["synced_at"]):
+            return False
+        return time.time() - row["synced_at"] < self.max_age
+
+    def lookup(
+        self, token: str, title: str, page_type: Optional[ParentType] = None
+    ) -> List[Page]:
+        """Return exact title matches, then substring matches, newest first."""
+        query = normalize_title(title)
+        sql = (
+            "SELECT * FROM pages WHERE owner = ? AND instr(norm_title, ?) > 0"
+            + (" AND type = ?" if page_type else "")
+            + " ORDER BY norm_title = ? DESC, last_edited_time DESC LIMIT ?"
+        )
+        params = [owner_key(token), query]
+        if page_type:
+            params.append(page_type)
+        params += [query, LOOKUP_LIMIT]
+
+        with closing(self._connect()) as db:
+            rows = db.execute(sql, params).fetchall()
+        return [
+            Page(
+                id=row["id"],
+                title=row["title"],
+                type=row["type"],
+                parent_type=row["parent_type"],
+                parent_id=row["parent_id"],
+                url=row["url"],
+                last_edited_time=row["last_edited_time"],
+            )
+            for row in rows
+        ]
+
+    def _claim(self, owner: str) -> Optional[sqlite3.Row]:
+        """Take the refresh lease for an owner, returning its sync state if won."""
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "INSERT OR IGNORE INTO sync_state (owner) VALUES (?)", (owner,)
+            )
+            row = db.execute(
+                "SELECT * FROM sync_state WHERE owner = ?", (owner,)
+            ).fetchone()
+            if row["lease_until"] > now:
+                db.execute("ROLLBACK")
+                return None
+            db.execute(
+                "UPDATE sync_state SET lease_until = ? WHERE owner = ?",
+                (now + REFRESH_LEASE, owner),
+            )
+            db.execute("COMMIT")
+            return row
+
+    def _store(self, owner: str, pages: List[Page], seen_at: float) -> None:
+        with closing(self._connect()) as db:
+            # One commit per batch; in autocommit mode each row would be its own
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        owner,
+                        page.id,
+                        page.title,
+                        normalize_title(page.title),
+                        page.type,
+                        page.parent_type,
+                        page.parent_id,
+                        page.url,
+                        page.last_edited_time,
+                        seen_at,
+                    )
+                    for page in pages
+                ],
+            )
+            db.execute("COMMIT")
+
+    def _finish(
+        self,
+        owner: str,
+        started: float,
+        watermark: Optional[str],
+        full: bool,
+        completed: bool,
+    ) -> None:
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            if completed:
+                if full:
+                    db.execute(
+                        "DELETE FROM pages WHERE owner = ? AND seen_at < ?",
+                        (owner, started),
+                    )
+                db.execute(
+                    "UPDATE sync_state SET synced_at = ?, watermark = ?,"
+                    " rebuilt_at = CASE WHEN ? THEN ? ELSE rebuilt_at END"
+                    " WHERE owner = ?",
+                    (started, watermark, full, started, owner),
+                )
+            db.execute(
+                "UPDATE sync_state SET lease_until = 0 WHERE owner = ?", (owner,)
+            )
+            db.execute("COMMIT")
+
+    async def refresh(self, token: str, pages: AsyncIterator[Page]) -> bool:
+        """
+        Bring the token's index up to date from a newest-first page stream.
+
+        Args:
+            token: Notion API token the pages belong to
+            pages: Every page visible to the token, most recently edited first
+
+        Returns:
+            True if a refresh ran to completion, False if another worker holds
+            the refresh lease or the stream failed part way
+        """
+        owner = owner_key(token)
+        if (state := await asyncio.to_thread(self._claim, owner)) is None:
+            return False
+
+        started = time.time()
+        rebuilt_at = state["rebuilt_at"]
+        full = not rebuilt_at or started - rebuilt_at > self.rebuild_age
+        previous = None if full else state["watermark"]
+        watermark, batch, completed = previous, [], False
+
+        try:
+            async for page in pages:
+                edited = page.last_edited_time
+                if previous and edited and edited < previous:
+                    break
+                if edited and (watermark is None or edited > watermark):
+                    watermark = edited
+                batch.append(page)
+                if len(batch) >= 100:
+                    await asyncio.to_thread(self._store, owner, batch, started)
+                    batch = []
+            await asyncio.to_thread(self._store, owner, batch, started)
+            completed = True
+        except Exception as e:
+            logger.error(f"Title index refresh failed: {e}")
+        finally:
+            if hasattr(pages, "aclose"):
+                await pages.aclose()
+            await asyncio.to_thread(
+                self._finish, owner, started, watermark, full, completed
+            )
+        return completed
+
+
+_index: Optional[TitleIndex] = None
+
+
+def configure_title_index(
+    path: Optional[str], max_age: float = DEFAULT_MAX_AGE
+) -> Optional[TitleIndex]:
+    """Enable the title index at `path`, or disable it when path is None."""
+    global _index
+    _index = TitleIndex(path, max_age) if path else None
+    return _index
+
+
+def get_title_index() -> Optional[TitleIndex]:
+    """
+    Return the configured title index, if any.
+
+    The index is opt-in: set NOTION_TITLE_INDEX_PATH (and optionally
+    NOTION_TITLE_INDEX_MAX_AGE) or call configure_title_index.
+    """
+    if _index is None and (path := os.environ.get("NOTION_TITLE_INDEX_PATH")):
+        max_age = os.environ.get("NOTION_TITLE_INDEX_MAX_AGE", DEFAULT_MAX_AGE)
+        configure_title_index(path, float(max_age))
+    return _index
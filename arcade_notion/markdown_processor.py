@@ -1,136 +1,336 @@
+import hashlib
 import re
-from typing import List, Dict, Any
+import time
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
 
+from .cache import TTLCache
+from .metrics import metrics
 
-def format_text(text: str) -> List[Dict[str, Any]]:
-    """Convert text with markdown formatting to Notion rich text."""
-    patterns = [
-        (r"\[([^\]]+)\]\(([^\)]+)\)", "link"),  # [text](url)
-        (r"\*\*(.*?)\*\*", "bold"),  # **bold**
-        (r"__(.*?)__", "bold"),  # __bold__
-        (r"\*(.*?)\*", "italic"),  # *italic*
-        (r"_(.*?)_", "italic"),  # _italic_
-        (r"~~(.*?)~~", "strikethrough"),  # ~~strikethrough~~
-        (r"`(.*?)`", "code"),  # `code`
-    ]
-
-    rich_text = []
-    last_index = 0
-    combined_pattern = "|".join(f"({pattern})" for pattern, _ in patterns)
+# Notion rejects rich text items whose content is longer than this
+MAX_TEXT_LENGTH = 2000
+# ...and rich text arrays with more items than this
+MAX_RICH_TEXT_ITEMS = 100
+
+# Block types that take the lines indented under them as nested children
+LIST_TYPES = {"bulleted_list_item", "numbered_list_item"}
+
+# Characters str.splitlines treats as line boundaries
+LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+# One pass over the text finds the next span of any kind; the named group
+# that matched says which kind it is
+INLINE_PATTERN = re.compile(
+    r"\[(?P<link>[^\]]+)\]\((?P<url>[^\)]+)\)"  # [text](url)
+    r"|\*\*(?P<bold>.*?)\*\*"  # **bold**
+    r"|__(?P<bold_>.*?)__"  # __bold__
+    r"|\*(?P<italic>.*?)\*"  # *italic*
+    r"|_(?P<italic_>.*?)_"  # _italic_
+    r"|~~(?P<strikethrough>.*?)~~"  # ~~strikethrough~~
+    r"|`(?P<code>.*?)`"  # `code`
+)
+GROUP_FORMATS = {
+    "bold": "bold",
+    "bold_": "bold",
+    "italic": "italic",
+    "italic_": "italic",
+    "strikethrough": "strikethrough",
+    "code": "code",
+}
+
+# Markers for each annotation when writing rich text back out as markdown,
+# innermost first
+MARKDOWN_MARKERS = (
+    ("code", "`"),
+    ("bold", "**"),
+    ("italic", "*"),
+    ("strikethrough", "~~"),
+)
+HEADING_PREFIXES = {"heading_1": "# ", "heading_2": "## ", "heading_3": "### "}
+LINK_TYPES = {"image", "video", "file", "pdf", "audio", "bookmark", "embed"}
+
+# Parsed documents kept for repeated identical content. Longer documents
+# are parsed every time rather than held in memory
+PARSE_CACHE_SIZE = 32
+PARSE_CACHE_MAX_LENGTH = 50_000  # characters
+_parse_cache = TTLCache(max_size=PARSE_CACHE_SIZE, ttl=float("inf"))
+metrics.register_collector("markdown_parse_cache", _parse_cache.stats)
+
+# {{name}} in a template. Each name is swapped for a private use character
+# while parsing, which the inline parser leaves alone and which can't be
+# split apart when long text is divided between rich text items
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_]\w*)\s*\}\}")
+FIRST_MARKER = 0xE000
+TEMPLATE_CACHE_SIZE = 64
 
-    for match in re.finditer(combined_pattern, text):
+
+@lru_cache(maxsize=None)
+def annotations(formats: FrozenSet[str] = frozenset()) -> Dict[str, Any]:
+    """
+    Return the shared annotations object for a set of formats.
+
+    Every span with the same formatting references the same dict, so these
+    must be treated as read-only.
+    """
+    return {
+        "bold": "bold" in formats,
+        "italic": "italic" in formats,
+        "strikethrough": "strikethrough" in formats,
+        "underline": False,
+        "code": "code" in formats,
+        "color": "default",
+    }
+
+
+def _span(
+    content: str, formats: FrozenSet[str], url: Optional[str] = None
+) -> Dict[str, Any]:
+    text = {"content": content, "link": {"url": url}} if url else {"content": content}
+    return {"type": "text", "text": text, "annotations": annotations(formats)}
+
+
+def _tokenize(
+    text: str,
+    formats: FrozenSet[str],
+    url: Optional[str],
+    rich_text: List[Dict[str, Any]],
+) -> None:
+    """Append the spans for `text`, nesting formats found inside other spans."""
+    last_index = 0
+    for match in INLINE_PATTERN.finditer(text):
         start, end = match.span()
         if start > last_index:
-            rich_text.append(
+            rich_text.append(_span(text[last_index:start], formats, url))
+
+        group = match.lastgroup
+        if group == "url":
+            _tokenize(match.group("link"), formats, match.group("url"), rich_text)
+        elif group == "code":
+            # Code spans are literal, so nothing inside them is parsed
+            rich_text.append(_span(match.group("code"), formats | {"code"}, url))
+        else:
+            _tokenize(
+                match.group(group), formats | {GROUP_FORMATS[group]}, url, rich_text
+            )
+        last_index = end
+
+    if last_index < len(text):
+        rich_text.append(_span(text[last_index:], formats, url))
+
+
+def format_text(text: str) -> List[Dict[str, Any]]:
+    """Convert text with markdown formatting to Notion rich text."""
+    rich_text: List[Dict[str, Any]] = []
+    _tokenize(text, frozenset(), None, rich_text)
+    return rich_text
+
+
+def split_rich_text(rich_text: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Split rich text items longer than MAX_TEXT_LENGTH into several items."""
+    if all(len(item["text"]["content"]) <= MAX_TEXT_LENGTH for item in rich_text):
+        return rich_text
+
+    result = []
+    for item in rich_text:
+        content = item["text"]["content"]
+        if len(content) <= MAX_TEXT_LENGTH:
+            result.append(item)
+            continue
+        for start in range(0, len(content), MAX_TEXT_LENGTH):
+            result.append(
                 {
-                    "type": "text",
-                    "text": {"content": text[last_index:start]},
-                    "annotations": {
-                        "bold": False,
-                        "italic": False,
-                        "strikethrough": False,
-                        "underline": False,
-                        "code": False,
-                        "color": "default",
+                    **item,
+                    "text": {
+                        **item["text"],
+                        "content": content[start : start + MAX_TEXT_LENGTH],
                     },
                 }
             )
+    return result
 
-        matched_text = match.group(0)
-        for pattern, format_type in patterns:
-            if m := re.match(pattern, matched_text):
-                if format_type == "link":
-                    rich_text.append(
-                        {
-                            "type": "text",
-                            "text": {
-                                "content": m.group(1),
-                                "link": {"url": m.group(2)},
-                            },
-                            "annotations": {
-                                "bold": False,
-                                "italic": False,
-                                "strikethrough": False,
-                                "underline": False,
-                                "code": False,
-                                "color": "default",
-                            },
-                        }
-                    )
-                else:
-                    rich_text.append(
-                        {
-                            "type": "text",
-                            "text": {"content": m.group(1)},
-                            "annotations": {
-                                "bold": format_type == "bold",
-                                "italic": format_type == "italic",
-                                "strikethrough": format_type == "strikethrough",
-                                "underline": False,
-                                "code": format_type == "code",
-                                "color": "default",
-                            },
-                        }
-                    )
-                break
 
-        last_index = end
+def split_block(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Split a block with more rich text items than Notion allows in one array.
 
-    if last_index < len(text):
-        rich_text.append(
-            {
-                "type": "text",
-                "text": {"content": text[last_index:]},
-                "annotations": {
-                    "bold": False,
-                    "italic": False,
-                    "strikethrough": False,
-                    "underline": False,
-                    "code": False,
-                    "color": "default",
-                },
-            }
-        )
+    The overflow goes into continuation blocks of the same type, and any
+    nested children stay under the last of them. Children are split the
+    same way. A block that needs no splitting is returned as is.
+    """
+    block_type = block["type"]
+    content = block[block_type]
+    if children := content.get("children"):
+        split_children = [part for child in children for part in split_block(child)]
+        if len(split_children) != len(children):
+            content = {**content, "children": split_children}
+    rich_text = content.get("rich_text") or []
+    if len(rich_text) <= MAX_RICH_TEXT_ITEMS:
+        if content is not block[block_type]:
+            block = {**block, block_type: content}
+        return [block]
 
-    return rich_text
+    parts = []
+    for start in range(0, len(rich_text), MAX_RICH_TEXT_ITEMS):
+        part = {key: value for key, value in content.items() if key != "children"}
+        part["rich_text"] = rich_text[start : start + MAX_RICH_TEXT_ITEMS]
+        parts.append({**block, block_type: part})
+    if "children" in content:
+        parts[-1][block_type]["children"] = content["children"]
+    return parts
 
 
 def parse_markdown(content: str) -> List[Dict[str, Any]]:
-    """Convert markdown content to Notion blocks."""
-    blocks = []
+    """
+    Convert markdown content to Notion blocks.
+
+    Results for documents up to PARSE_CACHE_MAX_LENGTH characters are cached
+    by content hash, and the blocks are shared with later calls for the same
+    content, so they must be treated as read-only.
+    """
+    key = None
+    if len(content) <= PARSE_CACHE_MAX_LENGTH:
+        key = hashlib.sha1(content.encode("utf-8", "surrogatepass")).digest()
+        if (cached := _parse_cache.get(key)) is not None:
+            return list(cached)
+
+    started = time.perf_counter()
+    blocks = list(parse_lines(content.splitlines()))
+    if metrics.enabled:
+        metrics.observe("markdown_parse_seconds", time.perf_counter() - started)
+        metrics.inc("markdown_blocks_total", len(blocks))
+    if key is not None:
+        _parse_cache.set(key, blocks)
+    return list(blocks)
+
+
+def iter_blocks(content: str) -> Iterator[Dict[str, Any]]:
+    """
+    Convert markdown content to Notion blocks, yielding them one at a time.
+
+    Nothing is parsed until the first block is asked for, so the caller
+    decides which thread does the work. Documents up to
+    PARSE_CACHE_MAX_LENGTH characters then go through parse_markdown and its
+    cache; longer ones are parsed as the blocks are consumed. Either way the
+    blocks must be treated as read-only.
+    """
+    if len(content) <= PARSE_CACHE_MAX_LENGTH:
+        yield from parse_markdown(content)
+    else:
+        yield from parse_lines(content.splitlines())
+
+
+def stream_blocks(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Convert streamed markdown to Notion blocks as soon as each line is complete.
+
+    Chunks can split lines anywhere, e.g. a file read in fixed-size pieces or
+    a model's streamed response.
+    """
+    return parse_lines(iter_lines(chunks))
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Reassemble complete lines, without line endings, from arbitrary text chunks."""
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).splitlines(keepends=True)
+        # The last piece may be a partial line, or half of a split "\r\n"
+        last = lines.pop() if lines else ""
+        if last and last[-1] in LINE_BREAKS and last[-1] != "\r":
+            lines.append(last)
+            last = ""
+        pending = last
+        for line in lines:
+            yield line.rstrip(LINE_BREAKS)
+    if pending:
+        yield pending.rstrip(LINE_BREAKS)
+
+
+def _dedent(line: str, columns: int) -> str:
+    """Remove up to `columns` columns of leading whitespace, counting tabs as 4."""
+    i = column = 0
+    while i < len(line) and column < columns and line[i] in " \t":
+        column = column + 4 - column % 4 if line[i] == "\t" else column + 1
+        i += 1
+    return line[i:]
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Convert markdown lines to Notion blocks, yielding them one at a time.
+
+    This is the parser behind parse_markdown, iter_blocks and stream_blocks;
+    code fences and list numbering carry over from line to line. Lines
+    indented under a list item become its nested children, so each
+    top-level block is yielded once the next top-level line shows its
+    subtree is complete. Code keeps its indentation relative to the fence.
+    """
     code_block = []
     in_code = False
     language = "plain text"
+    code_indent = 0
     numbered_list_index = 0
 
-    for line in content.splitlines():
-        line = line.strip()
+    # List items that can still take children, as (indent, block)
+    open_items: List[Tuple[int, Dict[str, Any]]] = []
+    # Last top-level block, held back until its subtree is complete
+    pending: List[Dict[str, Any]] = []
+
+    def place(block: Dict[str, Any], indent: int) -> List[Dict[str, Any]]:
+        """Attach a block to the tree and return any top-level block now complete."""
+        while open_items and open_items[-1][0] >= indent:
+            open_items.pop()
+        if open_items:
+            parent = open_items[-1][1]
+            parent[parent["type"]].setdefault("children", []).append(block)
+            done = []
+        else:
+            done = pending[:]
+            pending[:] = [block]
+        if block["type"] in LIST_TYPES:
+            open_items.append((indent, block))
+        return done
+
+    for raw in lines:
+        expanded = raw.expandtabs(4)
+        line = expanded.strip()
+        indent = len(expanded) - len(expanded.lstrip())
 
         if line.startswith("```"):
             if in_code:
-                blocks.append(
-                    {
-                        "type": "code",
-                        "code": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {"content": "\n".join(code_block)},
-                                }
-                            ],
-                            "language": language,
-                        },
-                    }
-                )
+                code = "\n".join(code_block)
+                block = {
+                    "type": "code",
+                    "code": {
+                        "rich_text": split_rich_text(
+                            [{"type": "text", "text": {"content": code}}]
+                        ),
+                        "language": language,
+                    },
+                }
+                for part in split_block(block):
+                    yield from place(part, code_indent)
                 code_block = []
                 in_code = False
             else:
                 in_code = True
                 language = line[3:].strip() or "plain text"
+                code_indent = indent
             continue
 
         if in_code:
-            code_block.append(line)
+            code_block.append(_dedent(raw.rstrip(), code_indent))
             continue
 
         if not line:
@@ -151,13 +351,192 @@ def parse_markdown(content: str) -> List[Dict[str, Any]]:
         elif line.startswith("> "):
             block_type, text = "quote", line[2:]
         elif line == "---":
-            blocks.append({"type": "divider", "divider": {}})
+            yield from place({"type": "divider", "divider": {}}, indent)
             continue
         else:
             block_type, text = "paragraph", line
 
-        blocks.append(
-            {"type": block_type, block_type: {"rich_text": format_text(text)}}
-        )
+        block = {
+            "type": block_type,
+            block_type: {"rich_text": split_rich_text(format_text(text))},
+        }
+        for part in split_block(block):
+            yield from place(part, indent)
+
+    yield from pending
+
+
+class MarkdownTemplate:
+    """
+    A markdown document with {{name}} placeholders, parsed once into blocks.
+
+    fill() copies only the parts of the block tree that hold placeholders,
+    substituting the values there; everything else is shared with the
+    compiled skeleton, so the blocks must be treated as read-only. Values
+    are inserted as plain text and take on the formatting around their
+    placeholder: they can't add blocks or markdown formatting of their own.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.names: List[str] = []
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.group(1) not in self.names:
+                self.names.append(match.group(1))
+        markers = {name: chr(FIRST_MARKER + i) for i, name in enumerate(self.names)}
+        if any(marker in source for marker in markers.values()):
+            raise ValueError("Template contains private use characters")
+
+        marked = PLACEHOLDER_PATTERN.sub(lambda m: markers[m.group(1)], source)
+        self.blocks = list(iter_blocks(marked))
+        self._markers = frozenset(markers.values())
+        # Per block, where its placeholders are: nested {key: ...} leading to
+        # True at each string with one, or None for a block without any
+        self._paths = [self._find(block) for block in self.blocks]
+
+    def fill(self, values: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Return the template's blocks with each placeholder replaced by its value.
+
+        Raises:
+            ValueError: If a placeholder has no value
+        """
+        if missing := [name for name in self.names if name not in values]:
+            raise ValueError(f"Missing template values: {', '.join(missing)}")
+        table = {
+            FIRST_MARKER + i: str(values[name]) for i, name in enumerate(self.names)
+        }
+        blocks = []
+        for block, paths in zip(self.blocks, self._paths):
+            if paths is None:
+                blocks.append(block)
+            else:
+                # Long values can need more rich text items than one block takes
+                blocks += split_block(self._fill(block, paths, table))
+        return blocks
+
+    def _find(self, node: Any) -> Any:
+        if isinstance(node, str):
+            return True if not self._markers.isdisjoint(node) else None
+        if isinstance(node, dict):
+            items: Iterable[Tuple[Any, Any]] = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            return None
+        paths = {key: found for key, child in items if (found := self._find(child))}
+        return paths or None
+
+    def _fill(self, node: Any, paths: Any, table: Dict[int, str]) -> Any:
+        if paths is True:
+            return node.translate(table)
+        filled = node.copy()
+        for key, inner in paths.items():
+            filled[key] = self._fill(node[key], inner, table)
+        if "rich_text" in paths:
+            # Values can leave a span empty, or make it too long for Notion
+            filled["rich_text"] = split_rich_text(
+                [item for item in filled["rich_text"] if item["text"]["content"]]
+            )
+        return filled
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> MarkdownTemplate:
+    """Return the compiled template for markdown source, compiling it once."""
+    return MarkdownTemplate(source)
+
+
+def render_rich_text(rich_text: List[Dict[str, Any]]) -> str:
+    """
+    Convert Notion rich text back to markdown, the reverse of format_text.
+
+    Adjacent items with the same formatting, such as the pieces of a long
+    split text, are merged so their markers aren't repeated.
+    """
+    runs: List[Tuple[str, Dict[str, Any], Optional[str]]] = []
+    for item in rich_text:
+        text = item.get("text") or {}
+        content = text.get("content", item.get("plain_text", ""))
+        notes = item.get("annotations") or {}
+        url = (text.get("link") or {}).get("url") or item.get("href")
+        if runs and runs[-1][1] == notes and runs[-1][2] == url:
+            runs[-1] = (runs[-1][0] + content, notes, url)
+        else:
+            runs.append((content, notes, url))
+
+    parts = []
+    for content, notes, url in runs:
+        # Markers must hug the text, so surrounding whitespace moves outside
+        core = content.strip()
+        if core:
+            for name, marker in MARKDOWN_MARKERS:
+                if notes.get(name):
+                    core = f"{marker}{core}{marker}"
+            if url:
+                core = f"[{core}]({url})"
+            lead = content[: len(content) - len(content.lstrip())]
+            trail = content[len(content.rstrip()) :]
+            content = f"{lead}{core}{trail}"
+        parts.append(content)
+    return "".join(parts)
+
+
+def render_block(block: Dict[str, Any], number: int = 1) -> List[str]:
+    """
+    Convert one Notion block, without its children, back to markdown lines.
+
+    Args:
+        block: The block, as returned by Notion or built by parse_markdown
+        number: The block's position in its numbered list, if it's in one
+
+    Returns:
+        The block's lines; empty for blocks markdown can't show
+    """
+    block_type = block["type"]
+    content = block.get(block_type) or {}
+    text = render_rich_text(content.get("rich_text", []))
+
+    if block_type == "paragraph":
+        line = text
+    elif block_type in HEADING_PREFIXES:
+        line = HEADING_PREFIXES[block_type] + text
+    elif block_type in ("bulleted_list_item", "toggle"):
+        line = f"- {text}"
+    elif block_type == "numbered_list_item":
+        line = f"{number}. {text}"
+    elif block_type == "to_do":
+        line = f"- [{'x' if content.get('checked') else ' '}] {text}"
+    elif block_type == "quote":
+        line = f"> {text}"
+    elif block_type == "callout":
+        emoji = (content.get("icon") or {}).get("emoji")
+        line = f"> {emoji} {text}" if emoji else f"> {text}"
+    elif block_type == "code":
+        language = content.get("language", "plain text")
+        fence = "```" + ("" if language == "plain text" else language)
+        return [fence, *text.split("\n"), "```"]
+    elif block_type == "equation":
+        return [f"$${content.get('expression', '')}$$"]
+    elif block_type == "divider":
+        return ["---"]
+    elif block_type == "table_row":
+        cells = [
+            render_rich_text(cell).replace("|", "\\|") for cell in content["cells"]
+        ]
+        return ["| " + " | ".join(cells) + " |"]
+    elif block_type in ("child_page", "child_database"):
+        url = f"https://www.notion.so/{block['id'].replace('-', '')}"
+        return [f"[{content.get('title') or 'Untitled'}]({url})"]
+    elif block_type in LINK_TYPES:
+        source = content.get(content.get("type")) or {}
+        if not (url := source.get("url") or content.get("url")):
+            return []
+        caption = render_rich_text(content.get("caption", [])) or url
+        return [f"{'!' if block_type == 'image' else ''}[{caption}]({url})"]
+    else:
+        return []
 
-    return blocks
+    # Text can hold line breaks; indent continuation lines to keep them together
+    first, *rest = line.split("\n")
+    return [first, *(f"  {part}" for part in rest)]
@@ -0,0 +1,119 @@
+import heapq
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from .types import Page, PageMatch
+
+# Fuzzy candidates scoring below this are not reported
+MIN_SCORE = 0.15
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a title for comparison: casefolded with collapsed whitespace."""
+    return " ".join(title.casefold().split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized title, padded so short titles still match."""
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleMatcher:
+    """
+    Reusable index for ranking pages against a title query.
+
+    Titles are normalized once and indexed by exact value and by character
+    trigram. A query is answered in up to three passes, each touching only
+    indexed candidates: exact titles (a dict lookup), titles containing the
+    query (checked against the postings of its rarest trigram, or every
+    title for queries under three characters), and, only
+    if those leave fewer than `k` results, trigram similarity.
+
+    Scores fall into bands that keep the old priorities: exact matches
+    score 1.0, titles containing the query score between 0.5 and 1.0
+    (shorter titles higher), and other titles score below 0.5.
+    """
+
+    def __init__(self, pages: Iterable[Page]):
+        self.pages: List[Page] = list(pages)
+        self._titles = [normalize_title(page.title) for page in self.pages]
+        self._gram_counts: List[int] = []
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+        for i, title in enumerate(self._titles):
+            self._exact[title].append(i)
+            grams = trigrams(title)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(i)
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        parent_id: Optional[str] = None,
+        min_score: float = MIN_SCORE,
+    ) -> List[PageMatch]:
+        """
+        Return the top `k` matches for a query.
+
+        Ties on score go to the most recently edited page, then to pages
+        under `parent_id` when one is given.
+        """
+        query = normalize_title(query)
+        titles = self._titles
+        scores: Dict[int, float] = dict.fromkeys(self._exact.get(query, ()), 1.0)
+
+        if len(query) < 3:
+            # Too short to have a trigram of its own, so every title is checked
+            candidates: Iterable[int] = range(len(titles))
+        else:
+            # Any title containing the query contains each of its trigrams
+            postings = [
+                self._postings.get(query[i : i + 3], ())
+                for i in range(len(query) - 2)
+            ]
+            candidates = min(postings, key=len)
+        for i in candidates:
+            if i not in scores and query in titles[i]:
+                scores[i] = 0.5 + 0.5 * len(query) / len(titles[i])
+
+        if len(scores) < k:
+            query_grams = trigrams(query)
+            shared: Counter = Counter()
+            for gram in query_grams:
+                shared.update(self._postings.get(gram, ()))
+            for i, count in shared.items():
+                if i not in scores:
+                    dice = 2 * count / (len(query_grams) + self._gram_counts[i])
+                    if (score := 0.5 * dice) >= min_score:
+                        scores[i] = score
+
+        def rank(i: int):
+            page = self.pages[i]
+            return (
+                scores[i],
+                page.last_edited_time or "",
+                parent_id is not None and page.parent_id == parent_id,
+            )
+
+        return [
+            PageMatch(self.pages[i], scores[i], match_type(scores[i]))
+            for i in heapq.nlargest(k, scores, key=rank)
+        ]
+
+    def best(self, query: str, parent_id: Optional[str] = None) -> Optional[PageMatch]:
+        """Return the single best match for a query, if any scores high enough."""
+        matches = self.search(query, k=1, parent_id=parent_id)
+        return matches[0] if matches else None
+
+
+def match_type(score: float) -> str:
+    """Describe a TitleMatcher score the way find_page_id reports it."""
+    if score >= 1.0:
+        return "exact match"
+    if score > 0.5:
+        return "similar match"
+    return "potential match"
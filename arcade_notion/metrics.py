@@ -0,0 +1,169 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+Hook = Callable[[str, str, float, Dict[str, str]], None]
+
+ENDPOINT_IDS = re.compile(r"^(blocks|pages|databases|users)/[^/?]+")
+
+
+def endpoint_name(endpoint: str) -> str:
+    """Collapse IDs in an endpoint path so metrics group by route."""
+    return ENDPOINT_IDS.sub(r"\1/{id}", endpoint)
+
+
+class Metrics:
+    """
+    In-process counters and histograms for the toolkit's hot paths.
+
+    Disabled by default, in which case every recording method returns
+    straight away. Enable it with NOTION_METRICS=1 or metrics.enable().
+    Hooks receive every event as it is recorded, and collectors add
+    gauges (such as the title cache counters) at export time.
+    """
+
+    def __init__(self, enabled: bool = False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._hooks: List[Hook] = []
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop all recorded values, keeping hooks and collectors."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def add_hook(self, hook: Hook) -> None:
+        """Call `hook(kind, name, value, labels)` for every recorded event."""
+        self._hooks.append(hook)
+
+    def register_collector(
+        self, name: str, collect: Callable[[], Dict[str, Any]]
+    ) -> None:
+        """Report the numbers `collect()` returns as gauges named `<name>_<key>`."""
+        self._collectors[name] = collect
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Add to a counter."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+        self._emit("counter", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a value in a histogram."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Bucket counts, then the running count and sum
+            if (values := series.get(key)) is None:
+                values = series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[i] += 1
+            values[-2] += 1
+            values[-1] += value
+        self._emit("histogram", name, value, labels)
+
+    def _emit(self, kind: str, name: str, value: float, labels: Dict[str, str]):
+        for hook in self._hooks:
+            hook(kind, name, value, labels)
+
+    def _gauges(self) -> Dict[str, float]:
+        gauges = {}
+        for prefix, collect in self._collectors.items():
+            for key, value in collect().items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{prefix}_{key}"] = float(value)
+        return gauges
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every metric as plain data, ready for JSON."""
+        with self._lock:
+            counters = {
+                name: [
+                    {"labels": dict(labels), "value": value}
+                    for labels, value in series.items()
+                ]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "buckets": dict(zip(map(str, self.buckets), values)),
+                        "count": values[-2],
+                        "sum": values[-1],
+                    }
+                    for labels, values in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {
+            "counters": counters,
+            "histograms": histograms,
+            "gauges": self._gauges(),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot["counters"].items():
+            lines.append(f"# TYPE {name} counter")
+            for item in series:
+                lines.append(f"{name}{_labels(item['labels'])} {item['value']}")
+        for name, series in snapshot["histograms"].items():
+            lines.append(f"# TYPE {name} histogram")
+            for item in series:
+                for bound, count in item["buckets"].items():
+                    labels = _labels({**item["labels"], "le": bound})
+                    lines.append(f"{name}_bucket{labels} {count}")
+                labels = _labels({**item["labels"], "le": "+Inf"})
+                lines.append(f"{name}_bucket{labels} {item['count']}")
+                labels = _labels(item["labels"])
+                lines.append(f"{name}_sum{labels} {item['sum']}")
+                lines.append(f"{name}_count{labels} {item['count']}")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    """Format a Prometheus label set, escaping backslashes and quotes."""
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics = Metrics(os.environ.get("NOTION_METRICS", "").lower() in ("1", "true"))
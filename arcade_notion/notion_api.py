@@ -1,9 +1,46 @@
-import requests
-from typing import Dict, Any
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+from .cache import TTLCache
+from .metrics import endpoint_name, metrics
+from .resilience import HEDGE_BUDGET, CircuitBreaker, LatencyWindow
+
+if TYPE_CHECKING:
+    # The HTTP libraries take longer to import than the rest of the toolkit,
+    # so they are imported where first used, not when the tools are loaded
+    import httpx
+    import requests
 
 NOTION_API_URL = "https://api.notion.com/v1/"
 NOTION_VERSION = "2022-06-28"
 
+DEFAULT_POOL_SIZE = 10
+# Tokens whose sessions and rate limiters are kept; the least recently used
+# beyond that are dropped, and their idle connections closed
+MAX_TOKENS = 256
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)  # (connect, read) seconds
+
+# Notion allows an average of three requests per second per integration
+DEFAULT_RATE = 3.0
+DEFAULT_BURST = 3
+DEFAULT_MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Endpoints that only read, although Notion has them take a POST body
+READ_POSTS = re.compile(r"^(search|databases/[^/]+/query)$")
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
 
 def get_headers(token: str) -> Dict[str, str]:
     """Generate headers for Notion API requests."""
@@ -14,6 +51,796 @@ def get_headers(token: str) -> Dict[str, str]:
     }
 
 
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Seconds to wait before retrying a failed request.
+
+    Honors a numeric Retry-After header when present, otherwise uses
+    exponential backoff with full jitter.
+    """
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+# Compact and strict about NaN, which Notion rejects. Non-ASCII text is
+# escaped, which keeps the intermediate string one byte per character
+_JSON_ENCODER = json.JSONEncoder(allow_nan=False, separators=(",", ":"))
+
+
+def stdlib_dumps(value: Any) -> bytes:
+    """Encode JSON with the standard library, as compact bytes."""
+    return _JSON_ENCODER.encode(value).encode("ascii")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a request body as compact UTF-8 JSON.
+
+    Uses orjson when it is installed, which writes the bytes directly and
+    is several times faster on large block payloads; otherwise the
+    standard library. Raises TypeError or ValueError for values JSON
+    can't represent.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return stdlib_dumps(value)
+
+
+def loads(content: bytes) -> Any:
+    """Decode a JSON response body. Raises ValueError if it isn't JSON."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def is_read(method: str, endpoint: str) -> bool:
+    """Whether a call only reads, so identical concurrent calls can share a result."""
+    return method == "GET" or (method == "POST" and bool(READ_POSTS.match(endpoint)))
+
+
+def _connect_failed(error: "requests.ConnectionError") -> bool:
+    """Whether requests failed to connect, so none of the request was sent."""
+    import requests
+    import urllib3
+
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for a single authorization token.
+
+    Callers reserve a slot and are told how long to wait for it. Slots are
+    handed out in arrival order, so concurrent tool invocations sharing a
+    token queue up fairly instead of racing each other into a 429.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve one request slot and return the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                refill = (now - self._updated) * self.rate
+                self._tokens = min(self.burst, self._tokens + refill)
+                self._updated = now
+            self._tokens -= 1
+            ready_at = self._updated + max(0.0, -self._tokens) / self.rate
+            return max(0.0, ready_at - now)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back new reservations for the given number of seconds."""
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self._updated:
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = resume_at
+
+
+class _BaseClient:
+    """
+    Connection, timeout and rate-limit settings shared by both clients.
+
+    Each endpoint (IDs collapsed, see endpoint_name) gets a CircuitBreaker:
+    once most of its recent calls failed with a 5xx, a 429 or a network
+    error, further calls fail fast for a while instead of waiting out
+    retries. Pass breaker=False to turn this off.
+    """
+
+    def __init__(
+        self,
+        base_url: str = NOTION_API_URL,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        buckets: Optional[TTLCache] = None,
+        coalesce: bool = True,
+        breaker: bool = True,
+        breakers: Optional[Dict[str, CircuitBreaker]] = None,
+        hedge: Optional[float] = None,
+    ):
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.coalesce = coalesce
+        self.breaker = breaker
+        self.hedge = hedge
+        self._buckets = new_token_cache() if buckets is None else buckets
+        self._breakers = {} if breakers is None else breakers
+        self._lock = threading.Lock()
+
+    def bucket(self, token: str) -> TokenBucket:
+        """Return the rate limiter for a token, creating it on first use."""
+        with self._lock:
+            if (bucket := self._buckets.peek(token)) is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets.set(token, bucket)
+            return bucket
+
+    def circuit(self, endpoint: str) -> Optional[CircuitBreaker]:
+        """Return the circuit breaker for an endpoint, or None if they're off."""
+        if not self.breaker:
+            return None
+        route = endpoint_name(endpoint)
+        with self._lock:
+            if (breaker := self._breakers.get(route)) is None:
+                breaker = self._breakers[route] = CircuitBreaker(route)
+            return breaker
+
+    def circuit_stats(self) -> Dict[str, int]:
+        """Return how many endpoints' breakers are open and the calls they refused."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        states = [breaker.stats() for breaker in breakers]
+        return {
+            "open": sum(state["state"] != "closed" for state in states),
+            "rejected": sum(state["rejected"] for state in states),
+        }
+
+    @staticmethod
+    def _rejected(endpoint: str) -> Dict[str, Any]:
+        return {
+            "data": None,
+            "error": (
+                f"Notion's {endpoint_name(endpoint)} endpoint is failing; "
+                "calls to it are paused for a moment"
+            ),
+            "meta": {
+                "queue_wait": 0.0,
+                "attempts": 0,
+                "status": None,
+                "circuit_open": True,
+            },
+        }
+
+    @staticmethod
+    def _failed(result: Dict[str, Any]) -> bool:
+        """Whether a call failed the way an outage would, rather than on its input."""
+        status = result["meta"]["status"]
+        return bool(result["error"]) and (status is None or status in RETRY_STATUSES)
+
+    @staticmethod
+    def _may_retry(
+        idempotent: bool, status: Optional[int] = None, sent: bool = True
+    ) -> bool:
+        """
+        Whether a failed attempt can be sent again.
+
+        Notion may already have applied a write that failed with a 5xx or
+        lost its connection midway, so sending it again could create a page
+        or append blocks twice. Writes are only retried on a 429, which
+        Notion rejects before applying, and when the connection failed before
+        anything was sent.
+        """
+        return idempotent or status == 429 or not sent
+
+    @staticmethod
+    def _backoff(
+        bucket: TokenBucket,
+        attempt: int,
+        status: Optional[int] = None,
+        retry_after: Optional[str] = None,
+    ) -> float:
+        """
+        Work out how long to sleep before retrying.
+
+        A 429 pauses the whole token's bucket instead, so every queued call
+        waits out the Retry-After period and this one sleeps no further.
+        """
+        delay = retry_delay(attempt, retry_after)
+        if status == 429:
+            bucket.pause(delay)
+            return 0.0
+        return delay
+
+    @staticmethod
+    def _record_attempt(
+        method: str,
+        endpoint: str,
+        status: Any,
+        seconds: float,
+        sent: int = 0,
+        received: int = 0,
+    ) -> None:
+        """Report one HTTP attempt: its latency, payload sizes and any 429."""
+        route = endpoint_name(endpoint)
+        metrics.observe(
+            "notion_request_seconds",
+            seconds,
+            method=method,
+            endpoint=route,
+            status=str(status),
+        )
+        metrics.inc("notion_bytes_sent_total", sent, endpoint=route)
+        metrics.inc("notion_bytes_received_total", received, endpoint=route)
+        if status == 429:
+            metrics.inc("notion_rate_limited_total", endpoint=route)
+
+    @staticmethod
+    def _record_call(
+        method: str, endpoint: str, result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Report a finished call: its outcome, retries and rate-limiter wait."""
+        route = endpoint_name(endpoint)
+        meta = result["meta"]
+        outcome = "error" if result["error"] else "ok"
+        if meta.get("circuit_open"):
+            outcome = "rejected"
+        metrics.inc(
+            "notion_requests_total", method=method, endpoint=route, outcome=outcome
+        )
+        if meta["attempts"] > 1:
+            metrics.inc("notion_retries_total", meta["attempts"] - 1, endpoint=route)
+        metrics.observe("notion_queue_wait_seconds", meta["queue_wait"], endpoint=route)
+        return result
+
+
+class NotionClient(_BaseClient):
+    """
+    Reusable Notion API client.
+
+    Keeps one keep-alive session per authorization token, so repeated calls
+    with the same token reuse their TCP/TLS connections instead of doing a
+    new handshake every time. Sessions and rate limiters are kept for the
+    MAX_TOKENS most recently used tokens. Calls are scheduled through a per-token
+    TokenBucket and transient failures are retried: 429s, failed connects,
+    and for reads also 5xx and dropped connections.
+    """
+
+    def __init__(self, **options: Any):
+        super().__init__(**options)
+        # token -> session, closed when evicted
+        self._sessions = new_token_cache(lambda _, session: session.close())
+
+    def _session(self, token: str) -> "requests.Session":
+        """Return the pooled session for a token, creating it on first use."""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        with self._lock:
+            if (session := self._sessions.peek(token)) is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_size
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(get_headers(token))
+                self._sessions.set(token, session)
+            return session
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        token: str,
+        body: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send a request to a Notion API endpoint.
+
+        Args:
+            method: HTTP method (GET, POST, PATCH, DELETE)
+            endpoint: API endpoint path
+            token: Notion API token
+            body: Optional JSON request body
+            params: Optional query string parameters
+
+        Returns:
+            Dictionary with response data or error message, plus a "meta"
+            entry with the seconds spent queued, the attempts made and the
+            last HTTP status
+        """
+        breaker = self.circuit(endpoint)
+        if breaker is not None and not breaker.allow():
+            result = self._rejected(endpoint)
+        else:
+            result = self._send(method, endpoint, token, body, params)
+            if breaker is not None:
+                breaker.record(self._failed(result))
+        if metrics.enabled:
+            self._record_call(method, endpoint, result)
+        return result
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        token: str,
+        body: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        import requests
+
+        url = f"{self.base_url}{endpoint}"
+        session = self._session(token)
+        bucket = self.bucket(token)
+        meta = {"queue_wait": 0.0, "attempts": 0, "status": None}
+        try:
+            # Encoded once, so retries resend the same bytes
+            content = None if body is None else dumps(body)
+        except (TypeError, ValueError) as e:
+            return {"data": None, "error": f"Invalid request body: {e}", "meta": meta}
+
+        idempotent = is_read(method, endpoint)
+        while True:
+            if wait := bucket.reserve():
+                meta["queue_wait"] += wait
+                time.sleep(wait)
+            meta["attempts"] += 1
+            retries_left = meta["attempts"] <= self.max_retries
+
+            started = time.monotonic()
+            try:
+                response = session.request(
+                    method, url, data=content, params=params, timeout=self.timeout
+                )
+            except requests.ConnectionError as e:
+                if metrics.enabled:
+                    self._record_attempt(
+                        method, endpoint, "error", time.monotonic() - started
+                    )
+                # Dropped or refused connections are transient, like a 5xx
+                sent = not _connect_failed(e)
+                if not (retries_left and self._may_retry(idempotent, sent=sent)):
+                    return {"data": None, "error": str(e), "meta": meta}
+                time.sleep(self._backoff(bucket, meta["attempts"]))
+                continue
+            except requests.RequestException as e:
+                return {"data": None, "error": str(e), "meta": meta}
+
+            meta["status"] = response.status_code
+            if metrics.enabled:
+                self._record_attempt(
+                    method,
+                    endpoint,
+                    response.status_code,
+                    time.monotonic() - started,
+                    len(response.request.body or b""),
+                    len(response.content),
+                )
+            if (
+                response.status_code in RETRY_STATUSES
+                and retries_left
+                and self._may_retry(idempotent, response.status_code)
+            ):
+                time.sleep(
+                    self._backoff(
+                        bucket,
+                        meta["attempts"],
+                        response.status_code,
+                        response.headers.get("Retry-After"),
+                    )
+                )
+                continue
+
+            try:
+                response.raise_for_status()
+                return {"data": loads(response.content), "error": None, "meta": meta}
+            except (requests.RequestException, ValueError) as e:
+                return {"data": None, "error": str(e), "meta": meta}
+
+    def get(
+        self, endpoint: str, token: str, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return self.request("GET", endpoint, token, params=params)
+
+    def post(self, endpoint: str, token: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request("POST", endpoint, token, body=body)
+
+    def patch(self, endpoint: str, token: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request("PATCH", endpoint, token, body=body)
+
+    def delete(self, endpoint: str, token: str) -> Dict[str, Any]:
+        return self.request("DELETE", endpoint, token)
+
+    def close(self) -> None:
+        """Close every pooled session."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+class AsyncNotionClient(_BaseClient):
+    """
+    Asyncio counterpart of NotionClient.
+
+    Pools connections per token with httpx and schedules calls through the
+    same kind of per-token TokenBucket. Pools are kept per event loop, since
+    an httpx client cannot be shared between loops, and for at most
+    MAX_TOKENS tokens on each.
+
+    Identical reads in flight at the same time (same token, method, endpoint,
+    body and parameters) are coalesced: one request is sent and every caller
+    gets its result, which callers must treat as read-only. Writes are never
+    coalesced. Pass coalesce=False to turn this off.
+
+    Reads can also be hedged, which is off by default: with hedge=0.95, a
+    read still unanswered after the endpoint's 95th percentile latency is
+    sent a second time and whichever answer comes first is used. Hedges are
+    capped at HEDGE_BUDGET of reads, so a slow spell can't double the load.
+    """
+
+    def __init__(self, **options: Any):
+        super().__init__(**options)
+        # event loop -> token -> pooled client, closed when evicted
+        self._sessions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # Closing evicted clients, kept referenced until done
+        self._closing: Set[asyncio.Task] = set()
+        # event loop -> request key -> in-flight request
+        self._inflight: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.reads = 0
+        self.coalesced = 0
+        # endpoint -> recent latencies of its reads, when hedging
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self.hedgeable = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedging_stats(self) -> Dict[str, int]:
+        """Return how many reads could be hedged, were, and were won by the hedge."""
+        return {
+            "reads": self.hedgeable,
+            "hedges": self.hedges,
+            "wins": self.hedge_wins,
+        }
+
+    def coalescing_stats(self) -> Dict[str, int]:
+        """Return how many reads were made and how many shared another's request."""
+        return {"reads": self.reads, "coalesced": self.coalesced}
+
+    def _session(self, token: str) -> "httpx.AsyncClient":
+        """Return the pooled client for a token on the running loop."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if (sessions := self._sessions.get(loop)) is None:
+                sessions = self._sessions[loop] = new_token_cache(self._close_later)
+            if (session := sessions.peek(token)) is None:
+                session = httpx.AsyncClient(
+                    headers=get_headers(token),
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                    ),
+                    timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                )
+                sessions.set(token, session)
+            return session
+
+    def _close_later(self, token: str, session: "httpx.AsyncClient") -> None:
+        """Close an evicted client on the running loop, which it belongs to."""
+        task = asyncio.get_running_loop().create_task(session.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        token: str,
+        body: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Send a request to a Notion API endpoint. See NotionClient.request."""
+        if not (self.coalesce and is_read(method, endpoint)):
+            return await self._call(method, endpoint, token, body, params)
+
+        self.reads += 1
+        key = (
+            token,
+            method,
+            endpoint,
+            json.dumps(body, sort_keys=True),
+            json.dumps(params, sort_keys=True),
+        )
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        if (future := inflight.get(key)) is not None:
+            self.coalesced += 1
+            result = await asyncio.shield(future)
+            return {**result, "meta": {**result["meta"], "coalesced": True}}
+
+        future = inflight[key] = asyncio.ensure_future(
+            self._call(method, endpoint, token, body, params)
+        )
+
+        def forget(done: asyncio.Future) -> None:
+            if inflight.get(key) is done:
+                del inflight[key]
+
+        future.add_done_callback(forget)
+        # Shielded so that cancelling one caller leaves the shared request running
+        return await asyncio.shield(future)
+
+    async def _call(
+        self,
+        method: str,
+        endpoint: str,
+        token: str,
+        body: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        breaker = self.circuit(endpoint)
+        if breaker is not None and not breaker.allow():
+            result = self._rejected(endpoint)
+        else:
+            if self.hedge is not None and is_read(method, endpoint):
+                result = await self._hedged(method, endpoint, token, body, params)
+            else:
+                result = await self._send(method, endpoint, token, body, params)
+            if breaker is not None:
+                breaker.record(self._failed(result))
+        if metrics.enabled:
+            self._record_call(method, endpoint, result)
+        return result
+
+    async def _hedged(
+        self,
+        method: str,
+        endpoint: str,
+        token: str,
+        body: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Send a read, again if it's slower than usual, and use the first answer."""
+        route = endpoint_name(endpoint)
+        with self._lock:
+            latencies = self._latencies.setdefault(route, LatencyWindow())
+        self.hedgeable += 1
+        delay = latencies.percentile(self.hedge)
+        if self.hedges >= HEDGE_BUDGET * self.hedgeable:
+            delay = None
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(
+            self._send(method, endpoint, token, body, params)
+        )
+        backup: Optional[asyncio.Future] = None
+        try:
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+            if delay is None or primary.done():
+                result = await primary
+                if not result["error"]:
+                    latencies.add(time.monotonic() - started)
+                return result
+
+            self.hedges += 1
+            metrics.inc("notion_hedged_requests_total", endpoint=route)
+            backup = asyncio.ensure_future(
+                self._send(method, endpoint, token, body, params)
+            )
+            pending = {primary, backup}
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((t for t in done if not t.result()["error"]), None)
+                # An error is only the answer once the other attempt failed too
+                if winner is not None or not pending:
+                    break
+            if winner is None:
+                result = done.pop().result()
+            else:
+                result = winner.result()
+                latencies.add(time.monotonic() - started)
+                if winner is backup:
+                    self.hedge_wins += 1
+                    metrics.inc("notion_hedge_wins_total", endpoint=route)
+            return {**result, "meta": {**result["meta"], "hedged": True}}
+        finally:
+            for task in (primary, backup):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        token: str,
+        body: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        import httpx
+
+        url = f"{self.base_url}{endpoint}"
+        session = self._session(token)
+        bucket = self.bucket(token)
+        meta = {"queue_wait": 0.0, "attempts": 0, "status": None}
+        try:
+            content = None if body is None else dumps(body)
+        except (TypeError, ValueError) as e:
+            return {"data": None, "error": f"Invalid request body: {e}", "meta": meta}
+
+        idempotent = is_read(method, endpoint)
+        while True:
+            if wait := bucket.reserve():
+                meta["queue_wait"] += wait
+                await asyncio.sleep(wait)
+            meta["attempts"] += 1
+            retries_left = meta["attempts"] <= self.max_retries
+
+            started = time.monotonic()
+            try:
+                response = await session.request(
+                    method, url, content=content, params=params
+                )
+            except (
+                httpx.NetworkError,
+                httpx.RemoteProtocolError,
+                httpx.ConnectTimeout,
+            ) as e:
+                if metrics.enabled:
+                    self._record_attempt(
+                        method, endpoint, "error", time.monotonic() - started
+                    )
+                # Dropped or refused connections are transient, like a 5xx
+                sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not (retries_left and self._may_retry(idempotent, sent=sent)):
+                    return {"data": None, "error": str(e), "meta": meta}
+                await asyncio.sleep(self._backoff(bucket, meta["attempts"]))
+                continue
+            except httpx.HTTPError as e:
+                return {"data": None, "error": str(e), "meta": meta}
+
+            meta["status"] = response.status_code
+            if metrics.enabled:
+                self._record_attempt(
+                    method,
+                    endpoint,
+                    response.status_code,
+                    time.monotonic() - started,
+                    len(response.request.content),
+                    len(response.content),
+                )
+            if (
+                response.status_code in RETRY_STATUSES
+                and retries_left
+                and self._may_retry(idempotent, response.status_code)
+            ):
+                await asyncio.sleep(
+                    self._backoff(
+                        bucket,
+                        meta["attempts"],
+                        response.status_code,
+                        response.headers.get("Retry-After"),
+                    )
+                )
+                continue
+
+            try:
+                response.raise_for_status()
+                return {"data": loads(response.content), "error": None, "meta": meta}
+            except (httpx.HTTPError, ValueError) as e:
+                return {"data": None, "error": str(e), "meta": meta}
+
+    async def get(
+        self, endpoint: str, token: str, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return await self.request("GET", endpoint, token, params=params)
+
+    async def post(
+        self, endpoint: str, token: str, body: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return await self.request("POST", endpoint, token, body=body)
+
+    async def patch(
+        self, endpoint: str, token: str, body: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return await self.request("PATCH", endpoint, token, body=body)
+
+    async def delete(self, endpoint: str, token: str) -> Dict[str, Any]:
+        return await self.request("DELETE", endpoint, token)
+
+    async def aclose(self) -> None:
+        """Close the pooled clients belonging to the running loop."""
+        with self._lock:
+            sessions = self._sessions.pop(asyncio.get_running_loop(), None)
+        for session in sessions.values() if sessions is not None else []:
+            await session.aclose()
+
+
+_client: Optional[NotionClient] = None
+_async_client: Optional[AsyncNotionClient] = None
+_client_lock = threading.RLock()
+
+
+def new_token_cache(
+    on_evict: Optional[Callable[[str, Any], None]] = None
+) -> TTLCache:
+    """An LRU of per-token state, holding at most MAX_TOKENS tokens."""
+    return TTLCache(max_size=MAX_TOKENS, ttl=float("inf"), on_evict=on_evict)
+
+
+def get_client() -> NotionClient:
+    """Return the shared client used by the module-level helpers."""
+    with _client_lock:
+        if _client is None:
+            configure_client()
+        return _client
+
+
+def get_async_client() -> AsyncNotionClient:
+    """Return the shared async client used by the module-level async helpers."""
+    with _client_lock:
+        if _async_client is None:
+            configure_client()
+        return _async_client
+
+
+def configure_client(**options: Any) -> NotionClient:
+    """
+    Replace the shared clients, closing the previous sync client's connections.
+
+    Accepts the same keyword options as NotionClient. The sync and async
+    clients share their token buckets and circuit breakers, so calls made
+    through either count against the same per-token rate limit and the same
+    endpoint health.
+    """
+    global _client, _async_client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        options.setdefault("buckets", new_token_cache())
+        options.setdefault("breakers", {})
+        _client = NotionClient(**options)
+        _async_client = AsyncNotionClient(**options)
+        metrics.register_collector(
+            "notion_single_flight", _async_client.coalescing_stats
+        )
+        metrics.register_collector("notion_hedging", _async_client.hedging_stats)
+        metrics.register_collector("notion_circuit", _async_client.circuit_stats)
+        return _client
+
+
+def get_request(
+    endpoint: str, token: str, params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Send a GET request to a Notion API endpoint."""
+    return get_client().get(endpoint, token, params)
+
+
 def post_request(endpoint: str, token: str, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Send a POST request to a Notion API endpoint.
@@ -26,12 +853,40 @@ def post_request(endpoint: str, token: str, body: Dict[str, Any]) -> Dict[str, A
     Returns:
         Dictionary with response data or error message
     """
-    url = f"{NOTION_API_URL}{endpoint}"
-    headers = get_headers(token)
+    return get_client().post(endpoint, token, body)
+
+
+def patch_request(endpoint: str, token: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Send a PATCH request to a Notion API endpoint."""
+    return get_client().patch(endpoint, token, body)
+
+
+def delete_request(endpoint: str, token: str) -> Dict[str, Any]:
+    """Send a DELETE request to a Notion API endpoint."""
+    return get_client().delete(endpoint, token)
+
+
+async def get_request_async(
+    endpoint: str, token: str, params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Send a GET request to a Notion API endpoint without blocking the loop."""
+    return await get_async_client().get(endpoint, token, params)
+
+
+async def post_request_async(
+    endpoint: str, token: str, body: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Send a POST request to a Notion API endpoint without blocking the loop."""
+    return await get_async_client().post(endpoint, token, body)
+
+
+async def patch_request_async(
+    endpoint: str, token: str, body: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Send a PATCH request to a Notion API endpoint without blocking the loop."""
+    return await get_async_client().patch(endpoint, token, body)
+
 
-    try:
-        response = requests.post(url, json=body, headers=headers)
-        response.raise_for_status()
-        return {"data": response.json(), "error": None}
-    except requests.RequestException as e:
-        return {"data": None, "error": str(e)}
+async def delete_request_async(endpoint: str, token: str) -> Dict[str, Any]:
+    """Send a DELETE request to a Notion API endpoint without blocking the loop."""
+    return await get_async_client().delete(endpoint, token)
@@ -0,0 +1,114 @@
+from itertools import chain, count
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .notion_api import dumps
+from .types import PlannedRequest
+
+# Notion's limits for a single create or append call
+MAX_BLOCKS_PER_REQUEST = 100  # in any one children array
+MAX_BLOCKS_PER_PAYLOAD = 1000  # across the whole request, nested blocks included
+MAX_NESTING_DEPTH = 2  # levels of children below the blocks being sent
+# Notion rejects bodies over 500 KB; the rest is room for the page's own fields
+MAX_PAYLOAD_BYTES = 450_000
+
+
+def children_of(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return a block's nested children, if any."""
+    return block[block["type"]].get("children", [])
+
+
+def block_count(block: Dict[str, Any]) -> int:
+    """Count a block and everything nested under it."""
+    return 1 + sum(block_count(child) for child in children_of(block))
+
+
+def fits(block: Dict[str, Any], depth: int = MAX_NESTING_DEPTH) -> bool:
+    """Whether a block and its whole subtree can go in one request."""
+    if not (children := children_of(block)):
+        return True
+    if depth == 0 or len(children) > MAX_BLOCKS_PER_REQUEST:
+        return False
+    return all(fits(child, depth - 1) for child in children)
+
+
+def without_children(block: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a block, leaving out its nested children."""
+    block_type = block["type"]
+    content = {k: v for k, v in block[block_type].items() if k != "children"}
+    return {**block, block_type: content}
+
+
+def plan_requests(blocks: Iterable[Dict[str, Any]]) -> Iterator[PlannedRequest]:
+    """
+    Pack a block tree into as few create/append calls as Notion allows.
+
+    Blocks are packed greedily in order, which is optimal for ordered
+    batches, until a call would go over Notion's block count or payload
+    size limits. A block whose subtree is too deep, too wide or too large for
+    one call is sent without its children, which are then appended to it
+    in follow-up calls. Such blocks never go in the page-creation call,
+    since only append responses return the IDs of the blocks they create.
+
+    Yields requests lazily, so a streamed document can be planned and
+    uploaded as it is parsed.
+    """
+    yield from _pack(iter(blocks), None, count(), create=True)
+
+
+def _pack(
+    blocks: Iterator[Dict[str, Any]],
+    parent: Optional[Tuple[int, int]],
+    indexes: Iterator[int],
+    create: bool = False,
+) -> Iterator[PlannedRequest]:
+    batch: List[Dict[str, Any]] = []
+    size = 0
+    length = 0  # encoded bytes of the blocks in the batch
+    # Children still to send for blocks in this batch, as (position, children)
+    deferred: List[Tuple[int, List[Dict[str, Any]]]] = []
+
+    for block in chain(blocks, [None]):
+        if block is not None:
+            whole = fits(block) and block_count(block) <= MAX_BLOCKS_PER_PAYLOAD
+            if whole:
+                encoded = len(dumps(block)) + 1  # and a comma
+                whole = encoded <= MAX_PAYLOAD_BYTES
+            if not whole:
+                encoded = len(dumps(without_children(block))) + 1
+            cost = block_count(block) if whole else 1
+            full = (
+                len(batch) >= MAX_BLOCKS_PER_REQUEST
+                or size + cost > MAX_BLOCKS_PER_PAYLOAD
+                or length + encoded > MAX_PAYLOAD_BYTES
+                or (create and not whole)
+            )
+            if not full:
+                size += _add(batch, deferred, block, whole, cost)
+                length += encoded
+                continue
+
+        if batch or create:
+            index = next(indexes)
+            yield PlannedRequest(children=batch, parent=parent)
+            for position, children in deferred:
+                yield from _pack(iter(children), (index, position), indexes)
+            batch, size, length, deferred, create = [], 0, 0, [], False
+
+        if block is not None:
+            size += _add(batch, deferred, block, whole, cost)
+            length += encoded
+
+
+def _add(
+    batch: List[Dict[str, Any]],
+    deferred: List[Tuple[int, List[Dict[str, Any]]]],
+    block: Dict[str, Any],
+    whole: bool,
+    cost: int,
+) -> int:
+    if whole:
+        batch.append(block)
+    else:
+        deferred.append((len(batch), children_of(block)))
+        batch.append(without_children(block))
+    return cost
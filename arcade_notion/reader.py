@@ -0,0 +1,128 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+from .notion_api import get_async_client
+
+MAX_PAGE_SIZE = 100
+DEFAULT_MAX_DEPTH = 5  # levels of nested children read below the page
+DEFAULT_MAX_BLOCKS = 2000
+
+# Blocks whose children belong to another page or database
+SEPARATE_TYPES = {"child_page", "child_database"}
+
+
+async def fetch_children_async(
+    token: str, block_id: str
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield a block's children a result page at a time, following cursors.
+
+    Raises:
+        RuntimeError: If a read fails
+    """
+    client = get_async_client()
+    params: Dict[str, Any] = {"page_size": MAX_PAGE_SIZE}
+    while True:
+        response = await client.get(f"blocks/{block_id}/children", token, params)
+        if response["error"]:
+            raise RuntimeError(f"Reading blocks failed: {response['error']}")
+        yield response["data"].get("results", [])
+        if not response["data"].get("has_more"):
+            return
+        if not (cursor := response["data"].get("next_cursor")):
+            return
+        params = {**params, "start_cursor": cursor}
+
+
+class PageReader:
+    """
+    Reads a page's block tree and writes it out as markdown.
+
+    Lines are produced in document order as soon as they are known, while
+    the subtrees of blocks already seen are read concurrently; the token's
+    rate limiter paces the calls. Reading stops at `max_blocks` blocks and
+    `max_depth` levels of nesting, and `truncated` records whether either
+    limit cut the page short.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        max_blocks: int = DEFAULT_MAX_BLOCKS,
+    ):
+        self.token = token
+        self.max_depth = max_depth
+        self.max_blocks = max_blocks
+        self.blocks = 0
+        self.truncated = False
+
+    def markdown(self, page_id: str) -> AsyncIterator[str]:
+        """
+        Yield the page's content as markdown lines.
+
+        Raises:
+            RuntimeError: If a read fails
+        """
+        return self._lines(page_id, 0, "")
+
+    async def _lines(
+        self, block_id: str, depth: int, indent: str, table: bool = False
+    ) -> AsyncIterator[str]:
+        from .markdown_processor import render_block
+
+        # Subtrees being read ahead, cancelled if the caller stops early
+        subtrees: List[asyncio.Task] = []
+        try:
+            number = 0
+            row = 0
+            async for results in fetch_children_async(self.token, block_id):
+                if (room := self.max_blocks - self.blocks) < len(results):
+                    results, self.truncated = results[: max(room, 0)], True
+                self.blocks += len(results)
+
+                reads: Dict[int, asyncio.Task] = {}
+                for i, block in enumerate(results):
+                    if block["type"] in SEPARATE_TYPES:
+                        continue
+                    if not block.get("has_children"):
+                        continue
+                    if depth + 1 >= self.max_depth:
+                        self.truncated = True
+                        continue
+                    # A table's rows line up with it; other children are indented
+                    table_rows = block["type"] == "table"
+                    reads[i] = asyncio.ensure_future(
+                        self._collect(
+                            block["id"],
+                            depth + 1,
+                            indent if table_rows else indent + "  ",
+                            table_rows,
+                        )
+                    )
+                    subtrees.append(reads[i])
+
+                for i, block in enumerate(results):
+                    number = number + 1 if block["type"] == "numbered_list_item" else 0
+                    for line in render_block(block, number):
+                        yield indent + line
+                    row += 1
+                    if table and row == 1:
+                        # Markdown tables need a header; the first row is taken as it
+                        columns = len(block.get("table_row", {}).get("cells", []))
+                        yield indent + "|" + " --- |" * columns
+                    if i in reads:
+                        for line in await reads.pop(i):
+                            yield line
+
+                if self.blocks >= self.max_blocks:
+                    return
+        finally:
+            for task in subtrees:
+                task.cancel()
+
+    async def _collect(
+        self, block_id: str, depth: int, indent: str, table: bool
+    ) -> List[str]:
+        return [line async for line in self._lines(block_id, depth, indent, table)]
+
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .metrics import metrics
+
+# Circuit breaker defaults: open when at least half of the calls made to an
+# endpoint in the last 30 seconds failed, provided there were 20 or more
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_MIN_CALLS = 20
+BREAKER_WINDOW = 30.0  # seconds
+BREAKER_COOLDOWN = 15.0  # seconds before a trial call is let through
+
+LATENCY_SAMPLES = 200
+HEDGE_MIN_SAMPLES = 20
+# Most hedges allowed, as a fraction of hedgeable calls
+HEDGE_BUDGET = 0.1
+
+
+class LatencyWindow:
+    """The most recent latencies of one endpoint, for percentile estimates."""
+
+    def __init__(self, size: int = LATENCY_SAMPLES):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(
+        self, fraction: float, min_samples: int = HEDGE_MIN_SAMPLES
+    ) -> Optional[float]:
+        """The latency below which `fraction` of samples fall, once there are enough."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Stops calls to an endpoint that is failing, so callers fail fast.
+
+    Closed, calls go through and their outcomes are tracked over a sliding
+    window. Once enough of them fail, the breaker opens and rejects calls
+    for `cooldown` seconds. Then one trial call is let through (half open):
+    success closes the breaker, failure opens it again. A trial that never
+    reports back is given up on after another cooldown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        min_calls: int = BREAKER_MIN_CALLS,
+        window: float = BREAKER_WINDOW,
+        cooldown: float = BREAKER_COOLDOWN,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.rejected = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()  # (time, failed)
+        self._failures = 0
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; a rejected call is counted."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "closed":
+                return True
+            if now - self._changed_at >= self.cooldown:
+                # Let one trial call through, or another if the last never reported
+                self._change("half_open", now)
+                return True
+            self.rejected += 1
+        metrics.inc("notion_circuit_rejected_total", endpoint=self.name)
+        return False
+
+    def record(self, failed: bool) -> None:
+        """Report the outcome of a call that allow() let through."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "open":
+                return  # a call from before it opened
+            if self.state == "half_open":
+                self._change("open" if failed else "closed", now)
+                return
+
+            self._outcomes.append((now, failed))
+            self._failures += failed
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._failures -= self._outcomes.popleft()[1]
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and self._failures >= self.failure_rate * calls:
+                self._change("open", now)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": len(self._outcomes),
+                "failures": self._failures,
+                "rejected": self.rejected,
+            }
+
+    def _change(self, state: str, now: float) -> None:
+        if state == "closed":
+            self._outcomes.clear()
+            self._failures = 0
+        if state != self.state:
+            metrics.inc(
+                "notion_circuit_transitions_total", endpoint=self.name, to=state
+            )
+        self.state = state
+        self._changed_at = now
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the toolkit's background event loop, starting it on first use.
+
+    The blocking service wrappers, used by scripts and the importer CLI, run
+    their coroutines on this one long-lived loop, so the async client's
+    connection pools survive between calls. The tools are coroutines that
+    the Arcade worker awaits on its own loop, and don't go through here.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="arcade-notion-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the background loop and block until it finishes."""
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync cannot be called from the toolkit's own loop")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
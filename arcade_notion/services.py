@@ -1,30 +1,92 @@
-from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from arcade.sdk import ToolContext
 from loguru import logger
 
-from .markdown_processor import parse_markdown
-from .notion_api import post_request
+from .cache import TTLCache
+from .database import DatabaseQuery
+from .index import get_title_index
+from .matcher import TitleMatcher, normalize_title
+from .metrics import metrics
+from .planner import block_count, plan_requests
+from .reader import DEFAULT_MAX_BLOCKS, DEFAULT_MAX_DEPTH, PageReader
+from .notion_api import get_async_client
+from .runner import run_sync
 from .types import NotionResult, Page, ParentType
+from .updater import update_page_async
+from .uploader import upload_page_async
+
+MAX_PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_REQUESTS = 10
+SEARCH_MAX_SECONDS = 10.0
+BULK_CONCURRENCY = 4
+
+T = TypeVar("T")
+
+# Search results per (token, normalized title, page_type, get_all), empty
+# lists included
+title_cache = TTLCache()
+metrics.register_collector("title_cache", title_cache.stats)
+# find_best_match results per title_cache entry and parent, as (pages, page,
+# match type); reused while the entry still holds the same list
+_best_matches = TTLCache(max_size=title_cache.max_size, ttl=title_cache.ttl)
+
+# Background title index refreshes, referenced until they finish
+_index_refreshes: Set[asyncio.Task] = set()
 
 
 def parse_page_from_result(result: Dict) -> Optional[Page]:
-    """Extract page information from Notion API result."""
+    """
+    Extract page information from Notion API result.
+
+    Reads only the fields Page needs: a database's title is top level, and a
+    page's title is its one property of type "title", whatever its name.
+    """
     try:
-        properties = result.get("properties", {})
-        for field in ["title", "Title", "name", "Name"]:
-            if title_field := properties.get(field, {}).get("title", []):
-                title = title_field[0].get("text", {}).get("content", "Untitled")
-                break
+        if result["object"] == "database":
+            title_field = result.get("title") or []
         else:
-            title = "Untitled"
+            properties = result.get("properties") or {}
+            title_property = properties.get("title")
+            if not (title_property and title_property.get("type") == "title"):
+                title_property = next(
+                    (
+                        value
+                        for value in properties.values()
+                        if value.get("type") == "title"
+                    ),
+                    {},
+                )
+            title_field = title_property.get("title") or []
+        title = "".join(
+            item.get("plain_text") or item.get("text", {}).get("content", "")
+            for item in title_field
+        )
 
-        parent = result.get("parent", {})
+        parent = result.get("parent") or {}
         parent_type = parent.get("type")
 
         return Page(
             id=result["id"],
-            title=title,
+            title=title or "Untitled",
             type=result["object"],
             parent_type=parent_type,
             parent_id=parent.get(parent_type),
@@ -36,23 +98,162 @@ def parse_page_from_result(result: Dict) -> Optional[Page]:
         return None
 
 
-def find_best_match(pages: List[Page], query: str) -> Tuple[Page, str]:
-    """Find the best matching page from a list."""
-    query = query.lower()
+def remember_page(token: str, page: Page) -> None:
+    """
+    Prime the title cache with a page we just created.
+
+    Notion's search index lags behind writes, so without this a lookup right
+    after creation could miss the new page or hit a cached negative entry.
+    A page without a last_edited_time is stamped with the current time, so
+    it outranks older pages with the same title.
+    """
+    if page.last_edited_time is None:
+        page.last_edited_time = (
+            datetime.now(timezone.utc)
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z")
+        )
+    for page_type in (None, page.type):
+        for get_all in (True, False):
+            cache_key = (token, normalize_title(page.title), page_type, get_all)
+            cached = title_cache.peek(cache_key) or []
+            title_cache.set(cache_key, [page, *cached])
+
+
+def find_best_match(
+    pages: List[Page],
+    query: str,
+    parent_id: Optional[str] = None,
+    cache_key: Optional[Tuple] = None,
+) -> Tuple[Page, str]:
+    """
+    Find the best matching page from a list.
 
-    # Try exact match first
-    if exact_matches := [p for p in pages if p.title.lower() == query]:
-        return exact_matches[0], "exact match"
+    With the title_cache key the pages were cached under, the answer is
+    kept for later lookups of the same cached results.
+    """
+    key = None if cache_key is None else (cache_key, parent_id)
+    if key is not None and (entry := _best_matches.peek(key)) is not None:
+        if entry[0] is pages:
+            return entry[1], entry[2]
+    page, match_type = _rank_pages(pages, query, parent_id)
+    if key is not None:
+        _best_matches.set(key, (pages, page, match_type))
+    return page, match_type
 
-    # Try partial match next
-    if partial_matches := [p for p in pages if query in p.title.lower()]:
-        return partial_matches[0], "similar match"
 
-    # Return most recent as fallback
+def _rank_pages(
+    pages: List[Page], query: str, parent_id: Optional[str]
+) -> Tuple[Page, str]:
+    # A plain scan finds exact titles; only other queries need the matcher
+    normalized = normalize_title(query)
+    if exact := [p for p in pages if normalize_title(p.title) == normalized]:
+        # Ranked the way TitleMatcher ranks equal scores
+        page = max(
+            exact,
+            key=lambda p: (
+                p.last_edited_time or "",
+                parent_id is not None and p.parent_id == parent_id,
+            ),
+        )
+        return page, "exact match"
+
+    if match := TitleMatcher(pages).best(query, parent_id):
+        return match.page, match.match_type
+
+    # Nothing resembles the title; Notion's search matched it some other way
     return pages[0], "potential match"
 
 
-def find_page_id(
+async def search_pages(
+    token: str,
+    query: Optional[str] = None,
+    page_size: int = SEARCH_PAGE_SIZE,
+    max_requests: Optional[int] = SEARCH_MAX_REQUESTS,
+    max_seconds: Optional[float] = SEARCH_MAX_SECONDS,
+    stop_when: Optional[Callable[[Page], bool]] = None,
+    page_type: Optional[ParentType] = None,
+) -> AsyncIterator[Page]:
+    """
+    Yield pages and databases from Notion search, following result cursors.
+
+    Results come most recently edited first. Callers can stop at any point
+    by breaking out of the loop; no further requests are sent.
+
+    Args:
+        token: Notion API token
+        query: Title text to search for, or None for everything visible
+        page_size: Results requested by the first call; later calls ask for
+            the maximum, since a caller that needs a second page of results
+            usually needs several
+        max_requests: Stop after this many search calls (None for no cap)
+        max_seconds: Don't start a new search call after this long (None for no cap)
+        stop_when: Don't fetch further result pages once a yielded page matches
+        page_type: Only return pages or only databases, filtered by Notion
+
+    Raises:
+        RuntimeError: If a search call fails
+    """
+    deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+    body = {
+        "sort": {"direction": "descending", "timestamp": "last_edited_time"},
+        "page_size": page_size,
+    }
+    if query:
+        body["query"] = query
+    if page_type:
+        body["filter"] = {"value": page_type, "property": "object"}
+
+    requests_made = 0
+    while True:
+        response = await get_async_client().post("search", token, body)
+        requests_made += 1
+        if response["error"]:
+            raise RuntimeError(f"Search failed: {response['error']}")
+
+        found = False
+        for result in response["data"].get("results", []):
+            if page := parse_page_from_result(result):
+                found = found or bool(stop_when and stop_when(page))
+                yield page
+
+        if found or not response["data"].get("has_more"):
+            return
+        if not (cursor := response["data"].get("next_cursor")):
+            return
+        if max_requests is not None and requests_made >= max_requests:
+            return
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        body["start_cursor"] = cursor
+        body["page_size"] = MAX_PAGE_SIZE
+
+
+async def lookup_in_index(
+    token: str, title: str, page_type: Optional[ParentType] = None
+) -> List[Page]:
+    """
+    Answer a title lookup from the local title index.
+
+    Returns an empty list when no index is configured or it is stale; a stale
+    index is refreshed in the background so later lookups can use it.
+    """
+    if (index := get_title_index()) is None:
+        return []
+
+    if await asyncio.to_thread(index.is_fresh, token):
+        return await asyncio.to_thread(index.lookup, token, title, page_type)
+
+    every_page = search_pages(
+        token, page_size=MAX_PAGE_SIZE, max_requests=None, max_seconds=None
+    )
+    task = asyncio.create_task(index.refresh(token, every_page))
+    _index_refreshes.add(task)
+    task.add_done_callback(_index_refreshes.discard)
+    return []
+
+
+async def find_page_id_async(
     context: ToolContext,
     title: str,
     get_all: bool = True,
@@ -61,29 +262,54 @@ def find_page_id(
     """
     Find Notion pages by title.
     Returns the best match and optionally all matching results.
+    Search results are cached per token, title, type and get_all; see
+    title_cache.
+    When a title index is configured and fresh, an exact title match in it
+    answers before live search.
+    When search fails, e.g. during an outage, an expired cached result is
+    used if there is one, and the result's data is marked stale.
     """
-    response = post_request(
-        "search",
-        context.authorization.token,
-        {
-            "query": title,
-            "sort": {"direction": "descending", "timestamp": "last_edited_time"},
-            "page_size": 10,
-        },
-    )
+    token = context.authorization.token
+    normalized = normalize_title(title)
+    # Without get_all, paging stops at the first exact match, so those
+    # shorter lists are cached apart from complete ones
+    cache_key = (token, normalized, page_type, get_all)
+    stale = False
 
-    if response["error"]:
-        return NotionResult(
-            success=False, message=f"Search failed: {response['error']}"
+    def is_exact(page: Page) -> bool:
+        return normalize_title(page.title) == normalized and (
+            not page_type or page.type == page_type
         )
 
-    # Get and filter valid pages
-    pages = [
-        page
-        for result in response["data"].get("results", [])
-        if (page := parse_page_from_result(result))
-        and (not page_type or page.type == page_type)
-    ]
+    if (pages := title_cache.get(cache_key)) is None:
+        indexed = await lookup_in_index(token, title, page_type)
+        # Even a fresh index can lag behind a page created moments ago, so
+        # only an exact title in it is trusted over live search
+        if any(is_exact(page) for page in indexed):
+            pages = indexed
+        else:
+            pages = []
+            try:
+                # Keep paging until an exact title match shows up or the caps hit
+                async for page in search_pages(
+                    token, title, stop_when=is_exact, page_type=page_type
+                ):
+                    pages.append(page)
+                    if not get_all and is_exact(page):
+                        break
+            except RuntimeError as e:
+                if pages:
+                    logger.warning(f"Using partial search results for '{title}': {e}")
+                elif pages := indexed:
+                    logger.warning(f"Using indexed results for '{title}': {e}")
+                elif pages := title_cache.get_stale(cache_key):
+                    stale = True
+                    logger.warning(f"Using expired results for '{title}': {e}")
+                else:
+                    return NotionResult(success=False, message=str(e))
+        if not stale:
+            ttl = None if pages else title_cache.negative_ttl
+            title_cache.set(cache_key, pages, ttl)
 
     if not pages:
         type_msg = f" of type '{page_type}'" if page_type else ""
@@ -92,48 +318,353 @@ def find_page_id(
         )
 
     # Find best match
-    best_match, match_type = find_best_match(pages, title)
+    best_match, match_type = find_best_match(pages, title, cache_key=cache_key)
 
     return NotionResult(
         success=True,
         message=(
             f"Found {match_type}: '{best_match.title}'"
             f"{f' ({len(pages)} total results)' if get_all else ''}"
+            f"{' from earlier results, as Notion search failed' if stale else ''}"
         ),
-        data={"id": best_match.id, "type": best_match.type},
+        data={
+            "id": best_match.id,
+            "title": best_match.title,
+            "type": best_match.type,
+            "match_type": match_type,
+            "stale": stale,
+        },
         matches=pages if get_all else None,
     )
 
 
-def create_page_with_parent(
+def find_page_id(
     context: ToolContext,
     title: str,
-    content: str,
+    get_all: bool = True,
+    page_type: Optional[ParentType] = None,
+) -> NotionResult:
+    """Blocking wrapper around find_page_id_async."""
+    return run_sync(find_page_id_async(context, title, get_all, page_type))
+
+
+async def create_page_from_blocks_async(
+    context: ToolContext,
+    title: str,
+    blocks: Iterable[Dict[str, Any]],
     parent_id: str,
     parent_type: ParentType = "page",
+    dry_run: bool = False,
 ) -> NotionResult:
-    """Create a new Notion page under a parent page or database."""
-    body = {
-        "parent": {"database_id": parent_id}
-        if parent_type == "database"
-        else {"page_id": parent_id},
-        "properties": {
+    """
+    Create a new Notion page from already parsed blocks, e.g. from stream_blocks.
+
+    With dry_run, nothing is sent; the result reports how many calls the
+    upload would take.
+    """
+    if dry_run:
+        plan = list(plan_requests(blocks))
+        total = sum(block_count(b) for request in plan for b in request.children)
+        return NotionResult(
+            success=True,
+            message=f"Page would be created in {len(plan)} requests",
+            data={"requests": len(plan), "blocks": total},
+        )
+
+    parent_key = "database_id" if parent_type == "database" else "page_id"
+    result = await upload_page_async(
+        context.authorization.token,
+        parent={parent_key: parent_id},
+        properties={
             "title": {"title": [{"type": "text", "text": {"content": title}}]}
         },
-        "children": parse_markdown(content),
-    }
+        blocks=blocks,
+    )
+
+    if result.data and result.data.get("id"):
+        remember_page(
+            context.authorization.token,
+            Page(
+                id=result.data["id"],
+                title=title,
+                type="page",
+                parent_type=parent_key,
+                parent_id=parent_id,
+            ),
+        )
+    return result
+
 
-    response = post_request("pages", context.authorization.token, body)
+async def create_page_with_parent_async(
+    context: ToolContext,
+    title: str,
+    content: Union[str, Iterable[str]],
+    parent_id: str,
+    parent_type: ParentType = "page",
+    dry_run: bool = False,
+) -> NotionResult:
+    """
+    Create a new Notion page under a parent page or database.
 
-    if response["error"]:
-        logger.error(f"Page creation failed: {response['error']}")
+    `content` is a markdown string, or an iterable of markdown text chunks
+    that is parsed and uploaded as it streams in. See
+    create_page_from_blocks_async for dry_run.
+    """
+    from .markdown_processor import iter_blocks, stream_blocks
+
+    if isinstance(content, str):
+        blocks = iter_blocks(content)
+    else:
+        blocks = stream_blocks(content)
+    return await create_page_from_blocks_async(
+        context, title, blocks, parent_id, parent_type, dry_run
+    )
+
+
+def create_page_with_parent(
+    context: ToolContext,
+    title: str,
+    content: Union[str, Iterable[str]],
+    parent_id: str,
+    parent_type: ParentType = "page",
+    dry_run: bool = False,
+) -> NotionResult:
+    """Blocking wrapper around create_page_with_parent_async."""
+    return run_sync(
+        create_page_with_parent_async(
+            context, title, content, parent_id, parent_type, dry_run
+        )
+    )
+
+
+async def _timed(awaitable: Awaitable[T]) -> Tuple[T, float]:
+    """Await something and return its result with the seconds it took."""
+    started = time.monotonic()
+    result = await awaitable
+    return result, time.monotonic() - started
+
+
+async def create_page_under_title_async(
+    context: ToolContext, parent_title: str, title: str, content: str
+) -> NotionResult:
+    """
+    Create a new page under the page or database with the given title.
+
+    The markdown is parsed while the parent lookup is in flight, and the
+    page is created as soon as both are done. The result's data records
+    how long each took and the time saved by overlapping them.
+    """
+    from .markdown_processor import parse_markdown
+
+    started = time.monotonic()
+    lookup = asyncio.ensure_future(_timed(find_page_id_async(context, parent_title)))
+    prepare = asyncio.ensure_future(_timed(asyncio.to_thread(parse_markdown, content)))
+
+    parent_result, lookup_time = await lookup
+    if not parent_result.success:
+        prepare.cancel()
         return NotionResult(
-            success=False, message=f"Creation failed: {response['error']}"
+            success=False,
+            message=f"Couldn't find parent page: {parent_result.message}",
+        )
+
+    blocks, prepare_time = await prepare
+    ready_time = time.monotonic() - started
+    result = await create_page_from_blocks_async(
+        context, title, blocks, parent_result.data["id"], parent_result.data["type"]
+    )
+
+    if not result.success:
+        result.message = f"Found parent but failed to create page: {result.message}"
+    result.data = {
+        **(result.data or {}),
+        "timings": {
+            "lookup": lookup_time,
+            "prepare": prepare_time,
+            "saved": max(0.0, lookup_time + prepare_time - ready_time),
+            "total": time.monotonic() - started,
+        },
+    }
+    return result
+
+
+def create_page_under_title(
+    context: ToolContext, parent_title: str, title: str, content: str
+) -> NotionResult:
+    """Blocking wrapper around create_page_under_title_async."""
+    return run_sync(
+        create_page_under_title_async(context, parent_title, title, content)
+    )
+
+
+async def create_pages_with_parent_async(
+    context: ToolContext,
+    pages: List[Tuple[str, str]],
+    parent_id: str,
+    parent_type: ParentType = "page",
+    concurrency: int = BULK_CONCURRENCY,
+) -> List[NotionResult]:
+    """
+    Create several pages under one parent concurrently.
+
+    Pages are parsed on worker threads and uploaded at most `concurrency`
+    at a time; the token's rate limiter paces the calls themselves. One
+    failed page doesn't stop the others.
+
+    Args:
+        context: Tool context with the Notion token
+        pages: (title, markdown content) for each page
+        parent_id: ID of the parent page or database
+        parent_type: Whether the parent is a page or a database
+        concurrency: Maximum number of pages uploading at once
+
+    Returns:
+        One NotionResult per page, in the same order as `pages`
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(title: str, content: str) -> NotionResult:
+        async with semaphore:
+            try:
+                return await create_page_with_parent_async(
+                    context, title, content, parent_id, parent_type
+                )
+            except Exception as e:
+                logger.error(f"Creating page '{title}' failed: {e}")
+                return NotionResult(success=False, message=f"Creation failed: {e}")
+
+    return list(await asyncio.gather(*(create(t, c) for t, c in pages)))
+
+
+def create_pages_with_parent(
+    context: ToolContext,
+    pages: List[Tuple[str, str]],
+    parent_id: str,
+    parent_type: ParentType = "page",
+    concurrency: int = BULK_CONCURRENCY,
+) -> List[NotionResult]:
+    """Blocking wrapper around create_pages_with_parent_async."""
+    return run_sync(
+        create_pages_with_parent_async(
+            context, pages, parent_id, parent_type, concurrency
         )
+    )
+
+
+async def update_page_content_async(
+    context: ToolContext, page_id: str, content: str, dry_run: bool = False
+) -> NotionResult:
+    """
+    Replace a page's content with markdown, sending only what changed.
+
+    Blocks whose content is unchanged are left alone; see update_page_async.
+    With dry_run, the page is read and the update planned but not sent.
+    """
+    from .markdown_processor import parse_markdown
+
+    blocks = await asyncio.to_thread(parse_markdown, content)
+    return await update_page_async(
+        context.authorization.token, page_id, blocks, dry_run
+    )
+
+
+def update_page_content(
+    context: ToolContext, page_id: str, content: str, dry_run: bool = False
+) -> NotionResult:
+    """Blocking wrapper around update_page_content_async."""
+    return run_sync(update_page_content_async(context, page_id, content, dry_run))
+
+
+async def read_page_async(
+    context: ToolContext,
+    page_id: str,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_blocks: int = DEFAULT_MAX_BLOCKS,
+) -> NotionResult:
+    """
+    Read a page's content as markdown.
+
+    Nested blocks are read concurrently; see PageReader. Reading stops at
+    `max_depth` levels of nesting and `max_blocks` blocks, and the result's
+    data says whether that cut the page short.
+    """
+    reader = PageReader(context.authorization.token, max_depth, max_blocks)
+    try:
+        lines = [line async for line in reader.markdown(page_id)]
+    except RuntimeError as e:
+        return NotionResult(success=False, message=str(e))
+
+    return NotionResult(
+        success=True,
+        message=f"Read {reader.blocks} blocks"
+        + (" (truncated)" if reader.truncated else ""),
+        data={
+            "id": page_id,
+            "markdown": "\n".join(lines),
+            "blocks": reader.blocks,
+            "truncated": reader.truncated,
+        },
+    )
+
+
+def read_page(
+    context: ToolContext,
+    page_id: str,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    max_blocks: int = DEFAULT_MAX_BLOCKS,
+) -> NotionResult:
+    """Blocking wrapper around read_page_async."""
+    return run_sync(read_page_async(context, page_id, max_depth, max_blocks))
 
-    if not (page_id := response["data"].get("id")):
-        return NotionResult(success=False, message="No page ID received from Notion")
+
+async def query_rows_async(
+    context: ToolContext,
+    database_id: str,
+    filter: Optional[Dict[str, Any]] = None,
+    sorts: Optional[List[Dict[str, Any]]] = None,
+    properties: Optional[List[str]] = None,
+    max_rows: int = MAX_PAGE_SIZE,
+) -> NotionResult:
+    """
+    Query a database and return its rows as compact JSON lines.
+
+    Rows are written out as they stream in (see DatabaseQuery) rather than
+    collected first, and the result's data says whether `max_rows` cut the
+    query short.
+    """
+    query = DatabaseQuery(
+        context.authorization.token, database_id, filter, sorts, properties, max_rows
+    )
+    try:
+        lines = [
+            json.dumps(row, separators=(",", ":"), ensure_ascii=False)
+            async for row in query.rows()
+        ]
+    except RuntimeError as e:
+        return NotionResult(success=False, message=str(e))
 
     return NotionResult(
-        success=True, message="Page created successfully", data={"id": page_id}
+        success=True,
+        message=f"Read {query.count} rows"
+        + (" (truncated)" if query.truncated else ""),
+        data={
+            "id": database_id,
+            "rows": "\n".join(lines),
+            "count": query.count,
+            "truncated": query.truncated,
+        },
+    )
+
+
+def query_rows(
+    context: ToolContext,
+    database_id: str,
+    filter: Optional[Dict[str, Any]] = None,
+    sorts: Optional[List[Dict[str, Any]]] = None,
+    properties: Optional[List[str]] = None,
+    max_rows: int = MAX_PAGE_SIZE,
+) -> NotionResult:
+    """Blocking wrapper around query_rows_async."""
+    return run_sync(
+        query_rows_async(context, database_id, filter, sorts, properties, max_rows)
     )
@@ -1,9 +1,25 @@
+"""
+The toolkit's Arcade tools.
+
+Importing them is kept cheap, since the worker loads every tool at startup:
+each tool imports the service layer when first called, and with it the HTTP
+clients and the markdown engine. See benchmarks/bench_import.py.
+"""
+
 from .get_page_id import get_page_id
 from .create_subpage import create_subpage
 from .create_page_by_title import create_page_by_parent_title
+from .create_pages_by_title import create_pages_by_parent_title
+from .update_page_by_title import update_page_by_title
+from .read_page_by_title import read_page_by_title
+from .query_database_by_title import query_database_by_title
 
 __all__ = [
     "get_page_id",
     "create_subpage",
     "create_page_by_parent_title",
+    "create_pages_by_parent_title",
+    "update_page_by_title",
+    "read_page_by_title",
+    "query_database_by_title",
 ]
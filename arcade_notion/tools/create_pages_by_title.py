@@ -0,0 +1,41 @@
+from typing import Annotated
+
+from arcade.sdk import ToolContext, tool
+from arcade.sdk.auth import OAuth2
+
+
+@tool(requires_auth=OAuth2(provider_id="notion"))
+async def create_pages_by_parent_title(
+    context: ToolContext,
+    parent_title: Annotated[
+        str,
+        "Title of an existing page/database where the new pages will be created, no need to include the page ID",
+    ],
+    pages: Annotated[
+        list[dict],
+        "Pages to create, each an object with a 'title' and its 'content' in markdown format",
+    ],
+) -> Annotated[str, "Summary with the new page IDs and any errors"]:
+    """Creates several new pages at once under an existing Notion page or database."""
+    from ..services import create_pages_with_parent_async, find_page_id_async
+
+    parent_result = await find_page_id_async(context, parent_title)
+    if not parent_result.success:
+        return f"Couldn't find parent page: {parent_result.message}"
+
+    results = await create_pages_with_parent_async(
+        context,
+        [(page.get("title", "Untitled"), page.get("content", "")) for page in pages],
+        parent_result.data["id"],
+        parent_result.data["type"],
+    )
+
+    created = sum(result.success for result in results)
+    lines = [f"Created {created} of {len(results)} pages under '{parent_title}'."]
+    for page, result in zip(pages, results):
+        title = page.get("title", "Untitled")
+        if result.success:
+            lines.append(f"- '{title}': ID {result.data['id']}")
+        else:
+            lines.append(f"- '{title}': {result.message}")
+    return "\n".join(lines)
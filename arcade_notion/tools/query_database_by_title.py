@@ -0,0 +1,44 @@
+from typing import Annotated, Optional
+
+from arcade.sdk import ToolContext, tool
+from arcade.sdk.auth import OAuth2
+
+
+@tool(requires_auth=OAuth2(provider_id="notion"))
+async def query_database_by_title(
+    context: ToolContext,
+    title: Annotated[str, "Title of the database to query"],
+    filter: Annotated[
+        Optional[dict],
+        "Notion filter object, e.g. "
+        '{"property": "Status", "select": {"equals": "Done"}}',
+    ] = None,
+    sorts: Annotated[
+        Optional[list[dict]],
+        'Notion sort objects, e.g. [{"property": "Due", "direction": "ascending"}]',
+    ] = None,
+    properties: Annotated[
+        Optional[list[str]],
+        "Names of the only properties to return (all when omitted)",
+    ] = None,
+    max_rows: Annotated[int, "Maximum number of rows to return"] = 100,
+) -> Annotated[str, "One JSON object per row, or error message"]:
+    """Queries a Notion database, optionally filtered and sorted, and returns its rows as JSON lines."""
+    from ..services import find_page_id_async, query_rows_async
+
+    database_result = await find_page_id_async(context, title, page_type="database")
+    if not database_result.success:
+        return f"Couldn't find database: {database_result.message}"
+
+    result = await query_rows_async(
+        context, database_result.data["id"], filter, sorts, properties, max_rows
+    )
+    if not result.success:
+        return result.message
+    if not result.data["count"]:
+        return "No rows match the query"
+
+    rows = result.data["rows"]
+    if result.data["truncated"]:
+        rows += f"\n(Only the first {result.data['count']} rows are shown.)"
+    return rows
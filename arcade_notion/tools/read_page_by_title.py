@@ -0,0 +1,34 @@
+from typing import Annotated
+
+from arcade.sdk import ToolContext, tool
+from arcade.sdk.auth import OAuth2
+
+
+@tool(requires_auth=OAuth2(provider_id="notion"))
+async def read_page_by_title(
+    context: ToolContext,
+    title: Annotated[str, "Title of the page to read"],
+) -> Annotated[
+    str,
+    "The title of the page read and how well it matched, then its content in "
+    "markdown format, or error message",
+]:
+    """Reads the content of an existing Notion page and returns it as markdown."""
+    from ..services import find_page_id_async, read_page_async
+
+    page_result = await find_page_id_async(context, title, page_type="page")
+    if not page_result.success:
+        return f"Couldn't find page: {page_result.message}"
+
+    result = await read_page_async(context, page_result.data["id"])
+    if not result.success:
+        return result.message
+
+    # Name the page read, since the closest title may not be the one asked for
+    content = (
+        f"Page '{page_result.data['title']}' ({page_result.data['match_type']}):"
+        f"\n\n{result.data['markdown']}"
+    )
+    if result.data["truncated"]:
+        content += "\n\n(The page is longer; only the beginning was read.)"
+    return content
@@ -0,0 +1,44 @@
+from typing import Annotated
+
+from arcade.sdk import ToolContext, tool
+from arcade.sdk.auth import OAuth2
+
+
+@tool(requires_auth=OAuth2(provider_id="notion"))
+async def update_page_by_title(
+    context: ToolContext,
+    title: Annotated[str, "Exact title of the existing page to update"],
+    content: Annotated[
+        str, "The page's complete new content in markdown format, replacing the old"
+    ],
+    dry_run: Annotated[
+        bool, "Only report how many changes the update would make, without saving"
+    ] = False,
+) -> Annotated[str, "Summary of the changes made or error message"]:
+    """Replaces the content of an existing Notion page, changing only the blocks that differ."""
+    from ..matcher import TitleMatcher
+    from ..services import find_page_id_async, update_page_content_async
+
+    page_result = await find_page_id_async(context, title, page_type="page")
+    if not page_result.success:
+        return f"Couldn't find page: {page_result.message}"
+    if page_result.data["match_type"] != "exact match":
+        # Rewriting a page is destructive, so a similar title isn't enough
+        ranked = TitleMatcher(page_result.matches).search(title, k=5)
+        candidates = ", ".join(f"'{match.page.title}'" for match in ranked)
+        return (
+            f"No page is titled exactly '{title}', so nothing was updated. "
+            f"Closest titles: {candidates}"
+        )
+
+    result = await update_page_content_async(
+        context, page_result.data["id"], content, dry_run=dry_run
+    )
+    if not result.success:
+        return result.message
+
+    changes = (
+        f"{result.data['updated']} blocks changed, "
+        f"{result.data['inserted']} added, {result.data['deleted']} removed"
+    )
+    return f"{result.message} ({changes}). ID: {result.data['id']}"
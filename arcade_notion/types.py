@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional, Dict, List, Literal
+from dataclasses import dataclass, field
+from typing import Any, Optional, Dict, List, Literal, Tuple
 
 ParentType = Literal["page", "database"]
 
@@ -17,6 +17,15 @@ class Page:
     last_edited_time: Optional[str] = None
 
 
+@dataclass
+class PageMatch:
+    """A page ranked against a title query."""
+
+    page: Page
+    score: float
+    match_type: str
+
+
 @dataclass
 class NotionResult:
     """Result object for Notion API operations."""
@@ -25,3 +34,51 @@ class NotionResult:
     message: str
     data: Optional[Dict] = None
     matches: Optional[List[Page]] = None
+
+
+@dataclass
+class PlannedRequest:
+    """
+    One Notion call in a page upload plan.
+
+    The first request of a plan creates the page. Later requests append to
+    the page (parent is None) or to a block created by an earlier append,
+    given as (request index, position in that request's children).
+    """
+
+    children: List[Dict[str, Any]]
+    parent: Optional[Tuple[int, int]] = None
+
+
+@dataclass
+class BlockEdit:
+    """
+    One change in a page update plan.
+
+    "update" rewrites block_id in place with the content of blocks[0],
+    "delete" removes block_id, and "insert" adds blocks under parent_id,
+    right after the block `after` (at the end when after is None).
+    """
+
+    action: Literal["update", "delete", "insert"]
+    block_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    after: Optional[str] = None
+    blocks: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class UploadState:
+    """
+    How far a page upload got, enough to resume it.
+
+    requests counts the planned requests already sent (the first created
+    the page) and blocks the blocks they carried. created holds the IDs of
+    the blocks each append created, by request index, for later requests
+    that nest under them.
+    """
+
+    page_id: Optional[str] = None
+    requests: int = 0
+    blocks: int = 0
+    created: Dict[int, List[str]] = field(default_factory=dict)
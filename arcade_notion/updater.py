@@ -0,0 +1,330 @@
+import asyncio
+import difflib
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .notion_api import get_async_client
+from .planner import block_count, children_of, plan_requests, without_children
+from .reader import fetch_children_async
+from .runner import run_sync
+from .types import BlockEdit, NotionResult
+
+UPDATE_CONCURRENCY = 4
+
+# Blocks the toolkit never writes; an update leaves them where they are,
+# so rewriting a page's text can't archive its subpages
+PRESERVED_TYPES = {"child_page", "child_database", "unsupported"}
+
+ANNOTATIONS = ("bold", "italic", "strikethrough", "underline", "code")
+EMPTY_VALUES = (None, False, "default", [], {})
+
+
+async def fetch_block_tree_async(token: str, block_id: str) -> List[Dict[str, Any]]:
+    """
+    Read a block's children, and theirs, following result cursors.
+
+    Nested children are stored under each block's content, the same shape
+    parse_markdown produces. Siblings' subtrees are read concurrently.
+    Subpages and child databases are not descended into.
+
+    Raises:
+        RuntimeError: If a read fails
+    """
+    blocks: List[Dict[str, Any]] = []
+    async for results in fetch_children_async(token, block_id):
+        blocks += results
+
+    parents = [
+        i
+        for i, block in enumerate(blocks)
+        if block.get("has_children") and block["type"] not in PRESERVED_TYPES
+    ]
+    subtrees = await asyncio.gather(
+        *(fetch_block_tree_async(token, blocks[i]["id"]) for i in parents)
+    )
+    # Copied rather than changed in place: responses may be shared by coalesced reads
+    for i, children in zip(parents, subtrees):
+        block_type = blocks[i]["type"]
+        blocks[i] = {
+            **blocks[i],
+            block_type: {**blocks[i][block_type], "children": children},
+        }
+    return blocks
+
+
+def _text_key(rich_text: List[Dict[str, Any]]) -> List[Tuple]:
+    """Rich text as (content, link, styles) runs, adjacent equal styles merged."""
+    runs: List[Tuple] = []
+    for item in rich_text:
+        text = item.get("text") or {}
+        content = text.get("content", item.get("plain_text", ""))
+        link = (text.get("link") or {}).get("url")
+        annotations = item.get("annotations") or {}
+        styles = [name for name in ANNOTATIONS if annotations.get(name)]
+        if (color := annotations.get("color", "default")) != "default":
+            styles.append(color)
+        if runs and runs[-1][1:] == (link, styles):
+            runs[-1] = (runs[-1][0] + content, link, styles)
+        else:
+            runs.append((content, link, styles))
+    return runs
+
+
+def content_key(block: Dict[str, Any]) -> List[Any]:
+    """
+    A block's type and content, without children, IDs or default values.
+
+    Blocks read back from Notion carry extra fields (plain text, default
+    colors, IDs) that the parser's output doesn't; both reduce to the same
+    key when they show the same thing.
+    """
+    block_type = block["type"]
+    key = {}
+    for name, value in block[block_type].items():
+        if name == "children":
+            continue
+        if name in ("rich_text", "caption"):
+            value = _text_key(value)
+        if value not in EMPTY_VALUES:
+            key[name] = value
+    return [block_type, key]
+
+
+def block_hash(block: Dict[str, Any], hashes: Dict[int, str]) -> str:
+    """Stable hash of a block and its whole subtree, memoized in `hashes`."""
+    if (digest := hashes.get(id(block))) is None:
+        children = [block_hash(child, hashes) for child in children_of(block)]
+        encoded = json.dumps([content_key(block), children], sort_keys=True)
+        digest = hashes[id(block)] = hashlib.sha1(encoded.encode()).hexdigest()
+    return digest
+
+
+def diff_blocks(
+    parent_id: str,
+    old: List[Dict[str, Any]],
+    new: List[Dict[str, Any]],
+    edits: Optional[List[BlockEdit]] = None,
+    hashes: Optional[Dict[int, str]] = None,
+) -> List[BlockEdit]:
+    """
+    Plan the edits that turn a parent's existing children into `new`.
+
+    Unchanged subtrees are matched by hash and left alone. Changed blocks
+    that keep their type are rewritten in place and their children diffed
+    in turn; everything else is deleted or inserted after the nearest
+    block that stays. Notion can't insert before a parent's first child,
+    so when new blocks lead, they are inserted after the first block that
+    would stay, followed by a copy of it, and the original is deleted.
+
+    Args:
+        parent_id: ID of the page or block owning `old`
+        old: Existing children, as read by fetch_block_tree_async
+        new: Desired children, as produced by parse_markdown
+
+    Returns:
+        Edits that can be sent concurrently, except that deletions must
+        wait for the insertions, which may be anchored on deleted blocks
+    """
+    edits = [] if edits is None else edits
+    hashes = {} if hashes is None else hashes
+    old = [block for block in old if block["type"] not in PRESERVED_TYPES]
+    matcher = difflib.SequenceMatcher(
+        None,
+        [block_hash(block, hashes) for block in old],
+        [block_hash(block, hashes) for block in new],
+        autojunk=False,
+    )
+    previous: Optional[str] = None  # block the pending blocks go after
+    pending: List[Dict[str, Any]] = []
+
+    def keep(existing: Dict[str, Any], wanted: Dict[str, Any], same: bool) -> None:
+        nonlocal previous, pending
+        if pending and previous is None:
+            # Nothing to insert after yet: anchor on this block and replace it
+            edits.append(BlockEdit("delete", block_id=existing["id"]))
+            pending.append(wanted)
+            previous = existing["id"]
+            return
+        if pending:
+            edits.append(
+                BlockEdit("insert", parent_id=parent_id, after=previous, blocks=pending)
+            )
+            pending = []
+        previous = existing["id"]
+        if same:
+            return
+        if content_key(existing) != content_key(wanted):
+            edits.append(
+                BlockEdit(
+                    "update", block_id=existing["id"], blocks=[without_children(wanted)]
+                )
+            )
+        diff_blocks(
+            existing["id"], children_of(existing), children_of(wanted), edits, hashes
+        )
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for existing, wanted in zip(old[i1:i2], new[j1:j2]):
+                keep(existing, wanted, True)
+            continue
+        removed, added = old[i1:i2], new[j1:j2]
+        for k in range(max(len(removed), len(added))):
+            existing = removed[k] if k < len(removed) else None
+            wanted = added[k] if k < len(added) else None
+            if existing and wanted and existing["type"] == wanted["type"]:
+                keep(existing, wanted, False)
+                continue
+            if existing:
+                edits.append(BlockEdit("delete", block_id=existing["id"]))
+            if wanted:
+                pending.append(wanted)
+
+    if pending:
+        edits.append(
+            BlockEdit("insert", parent_id=parent_id, after=previous, blocks=pending)
+        )
+    return edits
+
+
+def count_requests(edit: BlockEdit) -> int:
+    """Number of API calls an edit takes."""
+    if edit.action == "insert":
+        return sum(1 for _ in plan_requests(edit.blocks))
+    return 1
+
+
+async def _apply(token: str, edit: BlockEdit) -> Tuple[int, Optional[str]]:
+    """Send one edit, returning the calls made and the error, if any."""
+    client = get_async_client()
+    if edit.action == "delete":
+        response = await client.delete(f"blocks/{edit.block_id}", token)
+        return 1, response["error"]
+    if edit.action == "update":
+        block = edit.blocks[0]
+        response = await client.patch(
+            f"blocks/{edit.block_id}", token, {block["type"]: block[block["type"]]}
+        )
+        return 1, response["error"]
+
+    after = edit.after
+    # IDs of the blocks created by each request, for requests nested under them
+    created: Dict[int, List[str]] = {}
+    for index, request in enumerate(plan_requests(edit.blocks)):
+        body: Dict[str, Any] = {"children": request.children}
+        if request.parent is None:
+            target = edit.parent_id
+            if after:
+                body["after"] = after
+        else:
+            position_in, position = request.parent
+            target = created[position_in][position]
+        response = await client.patch(f"blocks/{target}/children", token, body)
+        if response["error"]:
+            return index + 1, response["error"]
+        created[index] = [r["id"] for r in response["data"].get("results", [])]
+        if request.parent is None and created[index]:
+            after = created[index][-1]
+    return len(created), None
+
+
+async def update_page_async(
+    token: str,
+    page_id: str,
+    blocks: List[Dict[str, Any]],
+    dry_run: bool = False,
+    concurrency: int = UPDATE_CONCURRENCY,
+) -> NotionResult:
+    """
+    Make a page's content match `blocks`, sending only the changes.
+
+    The page's current blocks are read and diffed against the new ones (see
+    diff_blocks), then the edits are sent at most `concurrency` at a time.
+    Subpages and child databases on the page are left untouched.
+
+    Args:
+        token: Notion API token
+        page_id: ID of the page to update
+        blocks: Desired page content, typically from parse_markdown
+        dry_run: Only read and plan; report the calls an update would take
+        concurrency: Maximum number of edits in flight at once
+
+    Returns:
+        NotionResult whose data counts the blocks updated, inserted and
+        deleted and the calls made (or planned, with dry_run)
+    """
+    try:
+        existing = await fetch_block_tree_async(token, page_id)
+    except RuntimeError as e:
+        return NotionResult(success=False, message=str(e))
+
+    edits = await asyncio.to_thread(diff_blocks, page_id, existing, blocks)
+    data = {
+        "id": page_id,
+        "updated": sum(edit.action == "update" for edit in edits),
+        "deleted": sum(edit.action == "delete" for edit in edits),
+        "inserted": sum(
+            block_count(block)
+            for edit in edits
+            if edit.action == "insert"
+            for block in edit.blocks
+        ),
+        "requests": sum(count_requests(edit) for edit in edits),
+    }
+
+    if not edits:
+        return NotionResult(
+            success=True, message="Page is already up to date", data=data
+        )
+    if dry_run:
+        return NotionResult(
+            success=True,
+            message=f"Page update would take {data['requests']} requests",
+            data=data,
+        )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    errors: List[str] = []
+
+    async def send(edit: BlockEdit) -> int:
+        async with semaphore:
+            if errors:
+                return 0
+            requests, error = await _apply(token, edit)
+            if error:
+                errors.append(error)
+            return requests
+
+    # Insertions may be anchored on blocks that are about to be deleted
+    writes = [edit for edit in edits if edit.action != "delete"]
+    deletes = [edit for edit in edits if edit.action == "delete"]
+    data["requests"] = sum(await asyncio.gather(*(send(edit) for edit in writes)))
+    data["requests"] += sum(await asyncio.gather(*(send(edit) for edit in deletes)))
+    if errors:
+        logger.error(f"Updating page {page_id} failed: {errors[0]}")
+        return NotionResult(
+            success=False,
+            message=(
+                f"Page update stopped after {data['requests']} requests: {errors[0]}"
+            ),
+            data={**data, "complete": False},
+        )
+    return NotionResult(
+        success=True,
+        message=f"Page updated in {data['requests']} requests",
+        data={**data, "complete": True},
+    )
+
+
+def update_page(
+    token: str,
+    page_id: str,
+    blocks: List[Dict[str, Any]],
+    dry_run: bool = False,
+    concurrency: int = UPDATE_CONCURRENCY,
+) -> NotionResult:
+    """Blocking wrapper around update_page_async."""
+    return run_sync(update_page_async(token, page_id, blocks, dry_run, concurrency))
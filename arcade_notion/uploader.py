@@ -0,0 +1,233 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from .metrics import metrics
+from .notion_api import get_async_client
+from .planner import block_count, plan_requests
+from .reader import fetch_children_async
+from .runner import run_sync
+from .types import NotionResult, PlannedRequest, UploadState
+
+
+async def upload_page_async(
+    token: str,
+    parent: Dict[str, str],
+    properties: Dict[str, Any],
+    blocks: Iterable[Dict[str, Any]],
+    on_progress: Optional[Callable[[int], None]] = None,
+    state: Optional[UploadState] = None,
+    on_request: Optional[Callable[[UploadState, int], None]] = None,
+) -> NotionResult:
+    """
+    Create a page and upload its block tree in calls Notion will accept.
+
+    The blocks are packed by plan_requests: the page is created with the
+    first request and the rest are appended through `blocks/{id}/children`,
+    nested deeper than one call allows included. The next request is
+    parsed and planned on a worker thread while the previous one is sent.
+
+    Planning is deterministic, so an interrupted upload can be resumed by
+    passing the same blocks with the state it reached: the requests it
+    already sent are planned again but skipped.
+
+    Args:
+        token: Notion API token
+        parent: Parent reference, e.g. {"page_id": "..."}
+        properties: Page properties, including the title
+        blocks: Notion blocks for the page body, typically from iter_blocks
+        on_progress: Called with the total number of uploaded blocks after each call
+        state: Progress of an earlier, interrupted upload of the same blocks;
+            updated in place as requests are sent
+        on_request: Called with the state and the request's index after each call
+
+    Returns:
+        NotionResult with the page ID, number of uploaded blocks and calls
+        made. If an append fails after the page was created, the result is
+        unsuccessful but still carries the page ID and the progress made.
+    """
+    plan = plan_requests(blocks)
+    client = get_async_client()
+    # Worker-thread seconds spent parsing and planning, reported once uploaded
+    prepare = [0.0]
+
+    def next_planned():
+        started = time.perf_counter()
+        try:
+            return next(plan, None)
+        finally:
+            prepare[0] += time.perf_counter() - started
+
+    def plan_ahead() -> asyncio.Future:
+        return asyncio.ensure_future(asyncio.to_thread(next_planned))
+
+    def skip_sent() -> None:
+        for _ in range(state.requests):
+            next_planned()
+
+    state = state or UploadState()
+    requests = 0  # calls made by this run
+    if state.page_id is None:
+        create = await asyncio.to_thread(next_planned)
+        next_request = plan_ahead()
+        response = await client.post(
+            "pages",
+            token,
+            {"parent": parent, "properties": properties, "children": create.children},
+        )
+
+        if response["error"]:
+            next_request.cancel()
+            logger.error(f"Page creation failed: {response['error']}")
+            return NotionResult(
+                success=False, message=f"Creation failed: {response['error']}"
+            )
+
+        if not (page_id := response["data"].get("id")):
+            next_request.cancel()
+            return NotionResult(
+                success=False, message="No page ID received from Notion"
+            )
+
+        state.page_id = page_id
+        state.requests = requests = 1
+        state.blocks = sum(block_count(block) for block in create.children)
+        if on_request:
+            on_request(state, 0)
+        if on_progress:
+            on_progress(state.blocks)
+    else:
+        page_id = state.page_id
+        await asyncio.to_thread(skip_sent)
+        next_request = plan_ahead()
+
+    # IDs of the blocks created by each append, for requests that nest under them
+    created = state.created
+
+    while (request := await next_request) is not None:
+        next_request = plan_ahead()
+        target = page_id
+        if request.parent is not None:
+            index, position = request.parent
+            target = created[index][position]
+
+        response = await client.patch(
+            f"blocks/{target}/children", token, {"children": request.children}
+        )
+        if response["error"]:
+            next_request.cancel()
+            logger.error(
+                f"Appending blocks to {page_id} failed after {state.blocks} blocks: "
+                f"{response['error']}"
+            )
+            return NotionResult(
+                success=False,
+                message=(
+                    f"Page created but upload stopped after {state.blocks} blocks: "
+                    f"{response['error']}"
+                ),
+                data={
+                    "id": page_id,
+                    "blocks_uploaded": state.blocks,
+                    "requests": requests,
+                    "complete": False,
+                },
+            )
+
+        index = state.requests
+        created[index] = [
+            result["id"] for result in response["data"].get("results", [])
+        ]
+        state.requests += 1
+        state.blocks += sum(block_count(block) for block in request.children)
+        requests += 1
+        if on_request:
+            on_request(state, index)
+        if on_progress:
+            on_progress(state.blocks)
+
+    if metrics.enabled:
+        metrics.observe("upload_prepare_seconds", prepare[0])
+        metrics.inc("upload_blocks_total", state.blocks)
+        metrics.inc("upload_requests_total", requests)
+    return NotionResult(
+        success=True,
+        message="Page created successfully",
+        data={
+            "id": page_id,
+            "blocks_uploaded": state.blocks,
+            "requests": requests,
+            "complete": True,
+        },
+    )
+
+
+async def confirm_request_async(
+    token: str, blocks: Iterable[Dict[str, Any]], state: UploadState
+) -> Optional[bool]:
+    """
+    Check whether the request after those in `state` reached Notion even
+    though its response never arrived, e.g. because the process died first.
+
+    The plan is replayed to find the request and how many children its
+    target had before it, and the target's children are counted. When the
+    request landed, state is advanced past it with the IDs it created.
+    With state.requests == 0, the request checked is the page creation and
+    state.page_id must be the page suspected to be its result.
+
+    Returns:
+        True if it landed, False if not, None if the target matches
+        neither, having been edited since
+
+    Raises:
+        RuntimeError: If reading the target's children fails
+    """
+
+    def replay() -> Tuple[Optional[PlannedRequest], int]:
+        plan = plan_requests(blocks)
+        # Children each target got from the requests already sent
+        sent: Dict[Optional[Tuple[int, int]], int] = {}
+        for _ in range(state.requests):
+            request = next(plan)
+            sent[request.parent] = sent.get(request.parent, 0) + len(request.children)
+        request = next(plan, None)
+        return request, sent.get(request.parent, 0) if request else 0
+
+    request, before = await asyncio.to_thread(replay)
+    if request is None:
+        return False
+    target = state.page_id
+    if request.parent is not None:
+        index, position = request.parent
+        target = state.created[index][position]
+
+    children: List[str] = []
+    async for results in fetch_children_async(token, target):
+        # Subpages may have been added to the page since
+        children += [r["id"] for r in results if r["type"] != "child_page"]
+    if len(children) != before + len(request.children):
+        return False if len(children) == before else None
+
+    state.created[state.requests] = children[before:]
+    state.requests += 1
+    state.blocks += sum(block_count(block) for block in request.children)
+    return True
+
+
+def upload_page(
+    token: str,
+    parent: Dict[str, str],
+    properties: Dict[str, Any],
+    blocks: Iterable[Dict[str, Any]],
+    on_progress: Optional[Callable[[int], None]] = None,
+    state: Optional[UploadState] = None,
+    on_request: Optional[Callable[[UploadState, int], None]] = None,
+) -> NotionResult:
+    """Blocking wrapper around upload_page_async."""
+    return run_sync(
+        upload_page_async(
+            token, parent, properties, blocks, on_progress, state, on_request
+        )
+    )
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark for format_text.
+
+Compares the single-pass tokenizer with the previous implementation, which
+rebuilt the combined regex on every call and re-matched each sub-pattern
+for every span. Also checks both produce the same spans for input without
+nested formatting.
+
+Usage: python -m benchmarks.bench_format_text
+"""
+
+import re
+import time
+from typing import Any, Dict, List
+
+from arcade_notion.markdown_processor import format_text
+
+LINES = [
+    "Plain paragraph text without any formatting at all, just words.",
+    "Some **bold** and *italic* and `code` in one line.",
+    "See [the docs](https://developers.notion.com) and ~~old~~ notes__x__.",
+    "**Owner:** _team_ — due `2024-06-01`, see [ticket](https://example.com/1).",
+]
+DOCUMENT_LINES = 5000
+
+
+def legacy_format_text(text: str) -> List[Dict[str, Any]]:
+    """format_text as it was before the single-pass tokenizer."""
+    patterns = [
+        (r"\[([^\]]+)\]\(([^\)]+)\)", "link"),  # [text](url)
+        (r"\*\*(.*?)\*\*", "bold"),  # **bold**
+        (r"__(.*?)__", "bold"),  # __bold__
+        (r"\*(.*?)\*", "italic"),  # *italic*
+        (r"_(.*?)_", "italic"),  # _italic_
+        (r"~~(.*?)~~", "strikethrough"),  # ~~strikethrough~~
+        (r"`(.*?)`", "code"),  # `code`
+    ]
+
+    rich_text = []
+    last_index = 0
+    combined_pattern = "|".join(f"({pattern})" for pattern, _ in patterns)
+
+    for match in re.finditer(combined_pattern, text):
+        start, end = match.span()
+        if start > last_index:
+            rich_text.append(
+                {
+                    "type": "text",
+                    "text": {"content": text[last_index:start]},
+                    "annotations": {
+                        "bold": False,
+                        "italic": False,
+                        "strikethrough": False,
+                        "underline": False,
+                        "code": False,
+                        "color": "default",
+                    },
+                }
+            )
+
+        matched_text = match.group(0)
+        for pattern, format_type in patterns:
+            if m := re.match(pattern, matched_text):
+                if format_type == "link":
+                    rich_text.append(
+                        {
+                            "type": "text",
+                            "text": {
+                                "content": m.group(1),
+                                "link": {"url": m.group(2)},
+                            },
+                            "annotations": {
+                                "bold": False,
+                                "italic": False,
+                                "strikethrough": False,
+                                "underline": False,
+                                "code": False,
+                                "color": "default",
+                            },
+                        }
+                    )
+                else:
+                    rich_text.append(
+                        {
+                            "type": "text",
+                            "text": {"content": m.group(1)},
+                            "annotations": {
+                                "bold": format_type == "bold",
+                                "italic": format_type == "italic",
+                                "strikethrough": format_type == "strikethrough",
+                                "underline": False,
+                                "code": format_type == "code",
+                                "color": "default",
+                            },
+                        }
+                    )
+                break
+
+        last_index = end
+
+    if last_index < len(text):
+        rich_text.append(
+            {
+                "type": "text",
+                "text": {"content": text[last_index:]},
+                "annotations": {
+                    "bold": False,
+                    "italic": False,
+                    "strikethrough": False,
+                    "underline": False,
+                    "code": False,
+                    "color": "default",
+                },
+            }
+        )
+
+    return rich_text
+
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    for line in LINES:
+        assert format_text(line) == legacy_format_text(line), line
+
+    document = [LINES[i % len(LINES)] for i in range(DOCUMENT_LINES)]
+    legacy = timed(lambda: [legacy_format_text(line) for line in document])
+    current = timed(lambda: [format_text(line) for line in document])
+    print(f"{DOCUMENT_LINES} lines")
+    print(f"  legacy      {legacy * 1000:8.1f} ms")
+    print(f"  single-pass {current * 1000:8.1f} ms  ({legacy / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
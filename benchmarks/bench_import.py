@@ -0,0 +1,109 @@
+"""
+Check how long a cold import of arcade_notion.tools takes.
+
+The Arcade worker imports every tool at startup, so the tools are kept
+cheap to import: the service layer, the HTTP clients and the markdown
+engine load when a tool is first called. Each run starts a fresh
+interpreter with `-X importtime`, once with the Arcade SDK already imported
+so the toolkit's own share can be told apart from the SDK's, which is
+outside its control. Fails if the toolkit's median share goes over the
+budget, or if any of the modules that should load lazily were imported.
+
+Usage:
+    python -m benchmarks.bench_import [--runs 5] [--budget 50]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+PACKAGE = "arcade_notion.tools"
+# Modules a tool only needs once it is called
+LAZY_MODULES = [
+    "arcade_notion.services",
+    "arcade_notion.notion_api",
+    "arcade_notion.markdown_processor",
+    "httpx",
+    "requests",
+]
+MARKER = "-- toolkit --"
+
+
+def import_times(code: str) -> List[Tuple[str, int, int]]:
+    """Run code in a fresh interpreter; (module, self us, cumulative us) rows."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if line == MARKER:
+            rows.clear()  # only what was imported after the marker
+            continue
+        _, _, timing = line.partition("import time:")
+        try:
+            self_us, cumulative_us, name = timing.split("|")
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue  # the header line
+    return rows
+
+
+def cumulative_ms(rows: List[Tuple[str, int, int]], module: str) -> float:
+    return next(total for name, _, total in rows if name == module) / 1000
+
+
+def measure(runs: int) -> Dict[str, object]:
+    cold, own = [], []
+    for _ in range(runs):
+        cold.append(cumulative_ms(import_times(f"import {PACKAGE}"), PACKAGE))
+        rows = import_times(
+            "import sys, arcade.sdk, arcade.sdk.auth\n"
+            f"sys.stderr.write({MARKER!r} + '\\n')\n"
+            f"import {PACKAGE}"
+        )
+        own.append(cumulative_ms(rows, PACKAGE))
+    imported = {name for name, _, _ in rows}
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:10]
+    return {
+        "cold": statistics.median(cold),
+        "own": statistics.median(own),
+        "eager": [name for name in LAZY_MODULES if name in imported],
+        "slowest": [(name, self_us / 1000) for name, self_us, _ in slowest],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=50.0,
+        help="most milliseconds the toolkit's own imports may take",
+    )
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs)
+    print(f"cold import of {PACKAGE}: {result['cold']:.1f} ms (median of {args.runs})")
+    print(f"  toolkit's own share:  {result['own']:.1f} ms (budget {args.budget:g} ms)")
+    print("  slowest of its imports:")
+    for name, ms in result["slowest"]:
+        print(f"    {ms:7.2f} ms  {name}")
+
+    failed = False
+    if result["own"] > args.budget:
+        print(f"\nOver budget by {result['own'] - args.budget:.1f} ms")
+        failed = True
+    if result["eager"]:
+        print(f"\nImported before first use: {', '.join(result['eager'])}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
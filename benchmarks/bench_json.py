@@ -0,0 +1,86 @@
+"""
+Benchmark encoding the request bodies of a 10k-block page.
+
+Compares what requests and httpx do with `json=` (stdlib json.dumps, then a
+second full-size copy to encode the string) with notion_api's encoders:
+the compact stdlib fallback and orjson, when it is installed. Reports the
+time to encode every body of the upload plan, the bytes sent, and the peak
+memory of encoding one full request body and the whole document at once.
+
+Usage: python -m benchmarks.bench_json
+"""
+
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from arcade_notion import notion_api
+from arcade_notion.markdown_processor import parse_markdown
+from arcade_notion.planner import plan_requests
+
+BLOCKS = 10_000
+LINES = [
+    "Paragraph {i} with **bold**, *italic* and `code` in it, café",
+    "- Item {i} linking to [the spec](https://example.com/spec/{i})",
+    "## Heading {i}",
+    "1. Step {i}: ~~old~~ new",
+    "Plain line {i} " + "lorem ipsum dolor " * 6,
+]
+
+
+def make_document(blocks: int) -> str:
+    return "\n".join(LINES[i % len(LINES)].format(i=i) for i in range(blocks))
+
+
+def requests_json(value: Any) -> bytes:
+    """What `json=` does in requests and httpx."""
+    return json.dumps(value).encode("utf-8")
+
+
+def timed(fn: Callable[[], Any], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    blocks = parse_markdown(make_document(BLOCKS))
+    bodies: List[Dict[str, Any]] = [
+        {"children": request.children} for request in plan_requests(blocks)
+    ]
+    document = {"children": blocks}
+    encoders: Dict[str, Callable[[Any], bytes]] = {
+        "json= (requests, httpx)": requests_json,
+        "notion_api.stdlib_dumps": notion_api.stdlib_dumps,
+    }
+    if notion_api.orjson is not None:
+        encoders["notion_api.dumps (orjson)"] = notion_api.orjson.dumps
+
+    print(f"{len(blocks)} blocks in {len(bodies)} request bodies")
+    for name, encode in encoders.items():
+        encode_all = timed(lambda: [encode(body) for body in bodies])
+        size = sum(len(encode(body)) for body in bodies)
+        body_peak = peak_memory(lambda: encode(bodies[0]))
+        document_peak = peak_memory(lambda: encode(document))
+        print(
+            f"  {name:26} {encode_all * 1000:7.1f} ms  {size / 1e6:5.2f} MB sent"
+            f"  peak {body_peak / 1e3:6.0f} kB per body"
+            f"  {document_peak / 1e6:5.1f} MB whole document"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark title matching at 10k and 100k titles.
+
+Compares the old linear exact/substring scans with TitleMatcher, reporting
+index build time and per-query latency for the single best match (what
+find_page_id needs) and for a top-5 ranking. Titles mix a few very common
+words with a larger vocabulary, like real workspaces do.
+
+Usage: python -m benchmarks.bench_matcher
+"""
+
+import random
+import string
+import time
+from typing import List
+
+from arcade_notion.matcher import TitleMatcher
+from arcade_notion.types import Page
+
+WORDS = [
+    "meeting", "notes", "team", "updates", "roadmap", "project", "weekly",
+    "report", "design", "review", "sprint", "planning", "retro", "budget",
+    "hiring", "launch", "recipes", "ideas", "backlog", "okrs",
+]  # fmt: skip
+QUERIES = ["Team Updates", "weekly report", "Sprint Planning 42", "roadmp", "zzz"]
+
+
+def make_pages(count: int) -> List[Page]:
+    rng = random.Random(count)
+    vocabulary = WORDS + [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        for _ in range(5000)
+    ]
+    pages = []
+    for i in range(count):
+        words = rng.sample(WORDS, rng.randint(0, 2))
+        words += rng.sample(vocabulary, rng.randint(1, 3))
+        suffix = f" {rng.randint(1, 500)}" if rng.random() < 0.5 else ""
+        pages.append(
+            Page(
+                id="".join(rng.choices(string.hexdigits, k=32)),
+                title=" ".join(words).title() + suffix,
+                type="page",
+                last_edited_time=f"2024-{rng.randint(1, 12):02d}-01T00:00:00.000Z",
+            )
+        )
+    return pages
+
+
+def linear_match(pages: List[Page], query: str) -> Page:
+    """The original find_best_match: two lowercase scans per call."""
+    query = query.lower()
+    if exact := [p for p in pages if p.title.lower() == query]:
+        return exact[0]
+    if partial := [p for p in pages if query in p.title.lower()]:
+        return partial[0]
+    return pages[0]
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    for count in (10_000, 100_000):
+        pages = make_pages(count)
+        build = timed(lambda: TitleMatcher(pages), repeat=1)
+        matcher = TitleMatcher(pages)
+        print(f"{count} titles: index build {build * 1000:.1f} ms")
+        for query in QUERIES:
+            linear = timed(lambda: linear_match(pages, query))
+            best = timed(lambda: matcher.best(query))
+            top5 = timed(lambda: matcher.search(query, k=5))
+            top = matcher.best(query)
+            print(
+                f"  {query!r:22} linear {linear * 1000:7.2f} ms"
+                f"  best {best * 1000:7.2f} ms"
+                f"  top-5 {top5 * 1000:7.2f} ms"
+                f"  -> {top.match_type if top else 'no match'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
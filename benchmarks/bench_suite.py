@@ -0,0 +1,332 @@
+"""
+End-to-end benchmarks against the offline Notion stand-in.
+
+Runs find_page_id, create_page_with_parent and the tools at several
+document sizes and concurrency levels. Service calls are made from their
+own threads; tool calls are coroutines awaited together on one event loop,
+the way the Arcade worker runs async tools. Reports latency percentiles,
+throughput and the API calls each run needed. Results can be saved as
+JSON and compared with an earlier run to catch regressions.
+
+Usage:
+    python -m benchmarks.bench_suite [--quick] [--latency 0.05] [--save out.json]
+    python -m benchmarks.bench_suite --compare baseline.json
+    python -m benchmarks.bench_suite --tail-rate 0.05 --hedge 0.95
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from arcade.core.schema import ToolAuthorizationContext
+from arcade.sdk import ToolContext
+
+from arcade_notion import notion_api, services
+from arcade_notion.runner import run_sync
+from arcade_notion.tools import (
+    create_page_by_parent_title,
+    create_pages_by_parent_title,
+    create_subpage,
+    get_page_id,
+)
+
+from .fake_notion import FakeNotion
+
+# Smallest p50 increase, in seconds, reported as a regression
+MIN_DELTA = 0.001
+
+CONTEXT = ToolContext(authorization=ToolAuthorizationContext(token="bench-token"))
+
+
+def make_markdown(blocks: int) -> str:
+    """A document of roughly `blocks` blocks mixing the supported syntax."""
+    pieces = []
+    for i in range(blocks):
+        kind = i % 6
+        if kind == 0:
+            pieces.append(f"## Section {i}")
+        elif kind == 1:
+            pieces.append(
+                f"Paragraph {i} with **bold**, *italic*, `code` "
+                f"and a [link](https://example.com/{i})."
+            )
+        elif kind == 2:
+            pieces.append(f"- Item {i}\n  - Nested item {i}")
+        elif kind == 3:
+            pieces.append(f"{i}. Numbered item")
+        elif kind == 4:
+            pieces.append(f"> Quote {i}")
+        else:
+            pieces.append(f"```python\nprint({i})\n```")
+    return "\n".join(pieces)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(
+    server: FakeNotion,
+    name: str,
+    params: Dict[str, Any],
+    call: Callable[[int], bool],
+    ops: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Run `call(i)` for i in range(ops) on `concurrency` threads."""
+    services.title_cache.clear()
+    server.reset_calls()
+    latencies: List[float] = []
+
+    def timed(i: int) -> bool:
+        started = time.perf_counter()
+        try:
+            return call(i)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        outcomes = list(pool.map(timed, range(ops)))
+    wall = time.perf_counter() - started
+
+    result = {
+        "name": name,
+        "params": {**params, "concurrency": concurrency},
+        "ops": ops,
+        "errors": outcomes.count(False),
+        "wall": wall,
+        "ops_per_second": ops / wall,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 0.95),
+        "max": max(latencies),
+        "api_calls": server.count_calls(),
+        "rate_limited": server.count_calls(429),
+    }
+    print(
+        f"{name:34} {json.dumps(result['params']):42}"
+        f" p50 {result['p50'] * 1000:8.1f} ms  p95 {result['p95'] * 1000:8.1f} ms"
+        f"  {result['ops_per_second']:7.1f} ops/s"
+        f"  {result['api_calls'] / ops:5.1f} calls/op"
+        f"{'  ' + str(result['errors']) + ' errors' if result['errors'] else ''}"
+    )
+    return result
+
+
+def run_suite(server: FakeNotion, quick: bool) -> List[Dict[str, Any]]:
+    workspace = 200 if quick else 2000
+    concurrencies = [1, 4] if quick else [1, 4, 16]
+    sizes = [10, 100] if quick else [10, 100, 1000]
+    ops = 8 if quick else 24
+
+    server.seed(workspace)
+    parent_id = server.add_page("Benchmark Parent")
+    results = []
+
+    for concurrency in concurrencies:
+        results.append(
+            measure(
+                server,
+                "find_page_id (cold)",
+                {"workspace": workspace},
+                lambda i: services.find_page_id(
+                    CONTEXT, f"Page {i * 7 % workspace}"
+                ).success,
+                ops,
+                concurrency,
+            )
+        )
+        results.append(
+            measure(
+                server,
+                "find_page_id (warm)",
+                {"workspace": workspace},
+                lambda i: services.find_page_id(CONTEXT, "Benchmark Parent").success,
+                ops,
+                concurrency,
+            )
+        )
+
+    for size in sizes:
+        content = make_markdown(size)
+        for concurrency in concurrencies:
+            results.append(
+                measure(
+                    server,
+                    "create_page_with_parent",
+                    {"blocks": size},
+                    lambda i: services.create_page_with_parent(
+                        CONTEXT, f"Doc {size}-{i}", content, parent_id
+                    ).success,
+                    max(4, ops // 4) if size >= 1000 else ops,
+                    concurrency,
+                )
+            )
+
+    content = make_markdown(sizes[1])
+    for concurrency in concurrencies:
+        results.append(
+            measure(
+                server,
+                "tool get_page_id",
+                {"workspace": workspace},
+                lambda i: "ID:"
+                in run_sync(get_page_id(CONTEXT, f"Page {i * 13 % workspace}")),
+                ops,
+                concurrency,
+            )
+        )
+        results.append(
+            measure(
+                server,
+                "tool create_subpage",
+                {"blocks": sizes[1]},
+                lambda i: "ID:"
+                in run_sync(create_subpage(CONTEXT, parent_id, f"Sub {i}", content)),
+                ops,
+                concurrency,
+            )
+        )
+        results.append(
+            measure(
+                server,
+                "tool create_page_by_parent_title",
+                {"blocks": sizes[1]},
+                lambda i: "ID:"
+                in run_sync(
+                    create_page_by_parent_title(
+                        CONTEXT, "Benchmark Parent", f"Titled {i}", content
+                    )
+                ),
+                ops,
+                concurrency,
+            )
+        )
+        results.append(
+            measure(
+                server,
+                "tool create_pages_by_parent_title",
+                {"blocks": sizes[1], "pages": 5},
+                lambda i: run_sync(
+                    create_pages_by_parent_title(
+                        CONTEXT,
+                        "Benchmark Parent",
+                        [
+                            {"title": f"Bulk {i}-{j}", "content": content}
+                            for j in range(5)
+                        ],
+                    )
+                ).startswith("Created 5 of 5"),
+                max(2, ops // 4),
+                concurrency,
+            )
+        )
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline_path: str, threshold: float
+) -> bool:
+    """Print p50 changes against a saved run; return False on any regression."""
+    with open(baseline_path) as f:
+        baseline = {
+            (item["name"], json.dumps(item["params"], sort_keys=True)): item
+            for item in json.load(f)["results"]
+        }
+
+    ok = True
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold:.0%}):")
+    for item in results:
+        key = (item["name"], json.dumps(item["params"], sort_keys=True))
+        if (before := baseline.get(key)) is None:
+            continue
+        change = item["p50"] / before["p50"] - 1
+        # Sub-millisecond differences are noise, whatever their ratio
+        regressed = change > threshold and item["p50"] - before["p50"] > MIN_DELTA
+        ok = ok and not regressed
+        print(
+            f"{'REGRESSED' if regressed else 'ok':10} {item['name']:34} {key[1]:42}"
+            f" p50 {before['p50'] * 1000:8.1f} -> {item['p50'] * 1000:8.1f} ms"
+            f" ({change:+.0%})"
+        )
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the toolkit offline.")
+    parser.add_argument("--quick", action="store_true", help="smaller matrix")
+    parser.add_argument("--latency", type=float, default=0.0, help="server seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="server seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 fraction")
+    parser.add_argument(
+        "--tail-rate", type=float, default=0.0, help="fraction of slow responses"
+    )
+    parser.add_argument(
+        "--tail-latency", type=float, default=1.0, help="extra seconds when slow"
+    )
+    parser.add_argument(
+        "--hedge",
+        type=float,
+        help="hedge reads slower than this latency percentile, e.g. 0.95",
+    )
+    parser.add_argument(
+        "--client-rate",
+        type=float,
+        default=1000.0,
+        help="client rate limit in requests per second (Notion allows 3)",
+    )
+    parser.add_argument("--save", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="compare with results saved earlier")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    server = FakeNotion(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=0.1,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+    )
+    with server:
+        notion_api.configure_client(
+            base_url=server.url,
+            rate=args.client_rate,
+            burst=int(args.client_rate),
+            hedge=args.hedge,
+        )
+        try:
+            results = run_suite(server, args.quick)
+        finally:
+            notion_api.configure_client()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                        "python": sys.version.split()[0],
+                        "platform": platform.platform(),
+                        "options": vars(args),
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Benchmark filling a recurring markdown template.
+
+Compares parsing each filled-in copy of a weekly report template from
+scratch with filling the compiled template, and with parse_markdown
+answering a repeat of the same document from its cache. Also checks that
+filling gives the same blocks as parsing for plain values.
+
+Usage: python -m benchmarks.bench_templates
+"""
+
+import time
+from typing import Dict
+
+from arcade_notion.markdown_processor import (
+    PLACEHOLDER_PATTERN,
+    compile_template,
+    parse_lines,
+    parse_markdown,
+)
+
+TEMPLATE = "\n".join(
+    [
+        "# Weekly report: {{team}}",
+        "Week of **{{week}}**, written by *{{author}}*.",
+        "## Highlights",
+        "- {{highlight}}",
+        "- See the [dashboard](https://example.com/dashboards/weekly) for numbers",
+    ]
+    + [
+        f"{i}. Standing agenda item {i} with **owners** and `status` to review"
+        for i in range(1, 31)
+    ]
+    + ["## Notes", "> {{quote}}"]
+    + [f"- Checklist entry {i}: confirm, update, *close*" for i in range(40)]
+)
+FILLS = 200
+
+
+def values(i: int) -> Dict[str, str]:
+    return {
+        "team": f"Team {i % 7}",
+        "week": f"2024-W{i % 52 + 1:02d}",
+        "author": f"Author {i}",
+        "highlight": f"Shipped feature {i} ahead of schedule",
+        "quote": f"Quote of the week number {i}",
+    }
+
+
+def substitute(values: Dict[str, str]) -> str:
+    return PLACEHOLDER_PATTERN.sub(lambda m: values[m.group(1)], TEMPLATE)
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    template = compile_template(TEMPLATE)
+    documents = [substitute(values(i)) for i in range(FILLS)]
+    for i in range(5):
+        assert template.fill(values(i)) == parse_markdown(documents[i])
+
+    parse = timed(
+        lambda: [list(parse_lines(document.splitlines())) for document in documents]
+    )
+    fill = timed(lambda: [template.fill(values(i)) for i in range(FILLS)])
+    compile_once = timed(lambda: compile_template.__wrapped__(TEMPLATE), repeat=1)
+    cached = timed(lambda: [parse_markdown(documents[0]) for _ in range(FILLS)])
+    print(f"{FILLS} reports of {len(template.blocks)} blocks each")
+    print(f"  parse each       {parse * 1000:8.2f} ms")
+    print(f"  fill template    {fill * 1000:8.2f} ms  ({parse / fill:.0f}x)")
+    print(f"    compiling once {compile_once * 1000:8.2f} ms")
+    print(f"  repeated parse   {cached * 1000:8.2f} ms  (cache hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,690 @@
+"""
+Offline stand-in for the parts of the Notion API the toolkit uses.
+
+Serves `search` (with cursors), `pages`, `pages/{id}`, `blocks/{id}`,
+`blocks/{id}/children`, `databases/{id}` and `databases/{id}/query` (equality
+filters, sorts, `filter_properties`) from memory, rejects payloads Notion
+would reject (too many blocks, nesting too deep, rich text too long) and can
+inject latency, slow outliers, random 429s, a per-token rate limit and
+failures of chosen requests (see fail). Used by the benchmark suite and the
+tests, and handy for trying the tools without a workspace.
+
+Usage: python -m benchmarks.fake_notion [--port 8765] [--pages 1000]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from arcade_notion.markdown_processor import MAX_RICH_TEXT_ITEMS, MAX_TEXT_LENGTH
+from arcade_notion.planner import (
+    MAX_BLOCKS_PER_PAYLOAD,
+    MAX_BLOCKS_PER_REQUEST,
+    MAX_NESTING_DEPTH,
+    children_of,
+)
+
+MAX_PAGE_SIZE = 100
+# Query string parameters that may be repeated
+LIST_PARAMS = {"filter_properties"}
+DEFAULT_ANNOTATIONS = {
+    "bold": False,
+    "italic": False,
+    "strikethrough": False,
+    "underline": False,
+    "code": False,
+    "color": "default",
+}
+
+
+class NotionError(Exception):
+    """An error response, raised while handling a request."""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def rich_text(content: str) -> List[Dict[str, Any]]:
+    return [{"type": "text", "text": {"content": content}, "plain_text": content}]
+
+
+def validate_children(children: Any) -> int:
+    """Check a children array against Notion's limits, returning its block count."""
+    if not isinstance(children, list):
+        raise NotionError(400, "validation_error", "children should be an array")
+
+    def check(blocks: List[Dict[str, Any]], depth: int) -> int:
+        if len(blocks) > MAX_BLOCKS_PER_REQUEST:
+            raise NotionError(
+                400,
+                "validation_error",
+                f"children length should be ≤ {MAX_BLOCKS_PER_REQUEST}, "
+                f"instead was {len(blocks)}",
+            )
+        total = 0
+        for block in blocks:
+            content = block.get(block.get("type"), {})
+            if len(content.get("rich_text", [])) > MAX_RICH_TEXT_ITEMS:
+                raise NotionError(
+                    400,
+                    "validation_error",
+                    f"rich_text length should be ≤ {MAX_RICH_TEXT_ITEMS}",
+                )
+            for item in content.get("rich_text", []):
+                if len(item.get("text", {}).get("content", "")) > MAX_TEXT_LENGTH:
+                    raise NotionError(
+                        400,
+                        "validation_error",
+                        f"text.content length should be ≤ {MAX_TEXT_LENGTH}",
+                    )
+            if nested := children_of(block):
+                if depth >= MAX_NESTING_DEPTH:
+                    raise NotionError(
+                        400,
+                        "validation_error",
+                        "children nested too deeply for a single request",
+                    )
+                total += check(nested, depth + 1)
+            total += 1
+        return total
+
+    total = check(children, 0)
+    if total > MAX_BLOCKS_PER_PAYLOAD:
+        raise NotionError(
+            400,
+            "validation_error",
+            f"a request may contain at most {MAX_BLOCKS_PER_PAYLOAD} blocks",
+        )
+    return total
+
+
+class FakeNotion:
+    """
+    In-memory Notion workspace served over HTTP on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        latency: Seconds added to every response
+        jitter: Up to this many extra seconds, chosen at random per response
+        tail_rate: Fraction of responses delayed by `tail_latency` more
+        tail_latency: Seconds added to the slow responses
+        error_rate: Fraction of requests answered with a 429
+        retry_after: Retry-After seconds sent with every 429
+        rate: Requests per second allowed per token before answering 429
+            (None for no limit)
+        seed: Seed for the injected jitter and errors
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        rate: Optional[float] = None,
+        seed: int = 0,
+        tail_rate: float = 0.0,
+        tail_latency: float = 1.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rate = rate
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.blocks: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.parents: Dict[str, str] = {}
+        self.calls: List[Tuple[str, str, Optional[int]]] = []  # (method, path, status)
+        # [method, path pattern, status, applied, remaining, let through first]
+        self._faults: List[List[Any]] = []
+        self._random = random.Random(seed)
+        self._clock = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self._allowance: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.notion = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to configure_client."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1/"
+
+    def start(self) -> "FakeNotion":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeNotion":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def fail(
+        self,
+        method: str,
+        path: str,
+        status: Optional[int] = 500,
+        times: int = 1,
+        applied: bool = True,
+        after: int = 0,
+    ) -> None:
+        """
+        Fail `times` requests matching a method and path pattern, once
+        `after` more matching requests have gone through.
+
+        The pattern is a regular expression matched against the whole path
+        after the version, e.g. "pages" or "blocks/[^/]+/children". With
+        applied, the request takes effect before the failure is returned,
+        like a response lost on the way back. A status of None drops the
+        connection without answering.
+        """
+        with self._lock:
+            self._faults.append(
+                [method, re.compile(path), status, applied, times, after]
+            )
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def count_calls(self, status: Optional[int] = None) -> int:
+        with self._lock:
+            return sum(status is None or call[2] == status for call in self.calls)
+
+    # Workspace contents
+
+    def _tick(self) -> str:
+        self._clock += timedelta(seconds=1)
+        return self._clock.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+    def add_page(
+        self,
+        title: str,
+        object_type: str = "page",
+        parent_id: Optional[str] = None,
+        parent_type: str = "page_id",
+    ) -> str:
+        """Add a page or database and return its ID."""
+        with self._lock:
+            return self._add_page(title, object_type, parent_id, parent_type)
+
+    def _add_page(
+        self,
+        title: str,
+        object_type: str,
+        parent_id: Optional[str],
+        parent_type: str,
+    ) -> str:
+        page_id = str(uuid.uuid4())
+        parent = (
+            {"type": parent_type, parent_type: parent_id}
+            if parent_id
+            else {"type": "workspace", "workspace": True}
+        )
+        page = {
+            "object": object_type,
+            "id": page_id,
+            "created_time": (edited := self._tick()),
+            "last_edited_time": edited,
+            "parent": parent,
+            "archived": False,
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+        }
+        if object_type == "database":
+            page["title"] = rich_text(title)
+            page["properties"] = {
+                "Name": {"id": "title", "name": "Name", "type": "title", "title": {}}
+            }
+        else:
+            page["properties"] = {
+                "title": {"id": "title", "type": "title", "title": rich_text(title)}
+            }
+        self.pages[page_id] = page
+        self.children[page_id] = []
+        return page_id
+
+    def add_database(
+        self,
+        title: str,
+        columns: Optional[Dict[str, str]] = None,
+        parent_id: Optional[str] = None,
+    ) -> str:
+        """
+        Add a database whose rows have a "Name" title and `columns`, given
+        as {name: property type}; title, rich_text, number, select and
+        checkbox values are supported.
+        """
+        with self._lock:
+            database_id = self._add_page(title, "database", parent_id, "page_id")
+            schema = self.pages[database_id]["properties"]
+            for name, kind in (columns or {}).items():
+                schema[name] = {"id": f"p{len(schema)}", "name": name, "type": kind}
+                schema[name][kind] = {}
+            return database_id
+
+    def add_row(self, database_id: str, values: Dict[str, Any]) -> str:
+        """Add a row to a database, its properties given as {name: plain value}."""
+        with self._lock:
+            schema = self.pages[database_id]["properties"]
+            row_id = self._add_page("", "page", database_id, "database_id")
+            properties = {}
+            for name, column in schema.items():
+                kind, value = column["type"], values.get(name)
+                if kind in ("title", "rich_text"):
+                    value = rich_text(value) if value else []
+                elif kind == "select":
+                    value = {"name": value} if value else None
+                elif kind == "checkbox":
+                    value = bool(value)
+                properties[name] = {"id": column["id"], "type": kind, kind: value}
+            self.pages[row_id]["properties"] = properties
+            return row_id
+
+    def seed(self, count: int, databases: float = 0.1) -> List[str]:
+        """Fill the workspace with `count` pages titled "Page 0", "Page 1", ..."""
+        return [
+            self.add_page(
+                f"Page {i}",
+                "database" if self._random.random() < databases else "page",
+            )
+            for i in range(count)
+        ]
+
+    def title_of(self, page: Dict[str, Any]) -> str:
+        if page["object"] == "database":
+            return "".join(item["plain_text"] for item in page["title"])
+        return "".join(
+            item["plain_text"]
+            for prop in page["properties"].values()
+            if prop["type"] == "title"
+            for item in prop["title"]
+        )
+
+    def _content(self, block: Dict[str, Any]) -> Dict[str, Any]:
+        """A block's content as Notion returns it, with its defaults filled in."""
+        block_type = block["type"]
+        content = {k: v for k, v in block[block_type].items() if k != "children"}
+        if "rich_text" in content:
+            content["rich_text"] = [
+                {
+                    **item,
+                    "annotations": {
+                        **DEFAULT_ANNOTATIONS,
+                        **item.get("annotations", {}),
+                    },
+                    "plain_text": item.get("text", {}).get("content", ""),
+                    "href": (item.get("text", {}).get("link") or {}).get("url"),
+                }
+                for item in content["rich_text"]
+            ]
+            if block_type != "code":
+                content.setdefault("color", "default")
+        return content
+
+    def _append(
+        self,
+        parent_id: str,
+        blocks: List[Dict[str, Any]],
+        after: Optional[str] = None,
+    ) -> List[Dict]:
+        siblings = self.children[parent_id]
+        if after is None:
+            position = len(siblings)
+        elif after in siblings:
+            position = siblings.index(after) + 1
+        else:
+            raise NotionError(400, "validation_error", "after block not found")
+
+        results = []
+        for block in blocks:
+            block_id = str(uuid.uuid4())
+            stored = {
+                "object": "block",
+                "id": block_id,
+                "type": block["type"],
+                "has_children": bool(children_of(block)),
+                block["type"]: self._content(block),
+            }
+            self.blocks[block_id] = stored
+            self.parents[block_id] = parent_id
+            siblings.insert(position, block_id)
+            position += 1
+            self.children[block_id] = []
+            self._append(block_id, children_of(block))
+            results.append(stored)
+        if results and parent_id in self.blocks:
+            self.blocks[parent_id]["has_children"] = True
+        return results
+
+    def _update_block(self, block_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        block = self.blocks[block_id]
+        block_type = block["type"]
+        if block_type not in body or "children" in body[block_type]:
+            raise NotionError(400, "validation_error", f"body should set {block_type}")
+        block[block_type] = self._content({"type": block_type, **body})
+        return block
+
+    def _delete_block(self, block_id: str) -> Dict[str, Any]:
+        block = self.blocks.pop(block_id)
+        parent_id = self.parents.pop(block_id)
+        self.children[parent_id].remove(block_id)
+        if parent_id in self.blocks and not self.children[parent_id]:
+            self.blocks[parent_id]["has_children"] = False
+        return {**block, "archived": True}
+
+    # Request handling
+
+    def _throttle(self, token: str) -> bool:
+        """Whether a request with this token is over the injected rate limit."""
+        if self.rate is None:
+            return False
+        now = time.monotonic()
+        allowance, updated = self._allowance.get(token, (self.rate, now))
+        allowance = min(self.rate, allowance + (now - updated) * self.rate)
+        if allowance < 1:
+            self._allowance[token] = (allowance, now)
+            return True
+        self._allowance[token] = (allowance - 1, now)
+        return False
+
+    def handle(
+        self, method: str, path: str, token: str, body: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if self._random.random() < self.tail_rate:
+            delay += self.tail_latency
+        if delay:
+            time.sleep(delay)
+
+        url = urlparse(path)
+        query = {
+            key: values if key in LIST_PARAMS else values[0]
+            for key, values in parse_qs(url.query).items()
+        }
+        parts = url.path.strip("/").split("/")[1:]  # drop the version prefix
+
+        with self._lock:
+            fault = next(
+                (
+                    fault
+                    for fault in self._faults
+                    if fault[0] == method and fault[1].fullmatch("/".join(parts))
+                ),
+                None,
+            )
+            if fault is not None and fault[5]:
+                fault[5] -= 1
+                fault = None
+            if fault is not None:
+                status, payload, headers = fault[2], {"code": "internal_error"}, {}
+                if fault[3]:
+                    try:
+                        self._route(method, parts, query, body)
+                    except NotionError:
+                        pass
+                fault[4] -= 1
+                if not fault[4]:
+                    self._faults.remove(fault)
+            elif self._throttle(token) or self._random.random() < self.error_rate:
+                status, payload, headers = (
+                    429,
+                    {"code": "rate_limited", "message": "Rate limited"},
+                    {"Retry-After": str(self.retry_after)},
+                )
+            else:
+                try:
+                    status, payload = 200, self._route(method, parts, query, body)
+                except NotionError as e:
+                    status, payload = e.status, {"code": e.code, "message": str(e)}
+                headers = {}
+            self.calls.append((method, url.path, status))
+
+        if status is not None and status != 200:
+            payload = {"object": "error", "status": status, **payload}
+        return status, payload, headers
+
+    def _route(
+        self,
+        method: str,
+        parts: List[str],
+        query: Dict[str, Any],
+        body: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        if method == "POST" and parts == ["search"]:
+            return self._search(body)
+        if method == "POST" and parts == ["pages"]:
+            return self._create_page(body)
+        if method == "GET" and len(parts) == 2 and parts[0] == "pages":
+            if (page := self.pages.get(parts[1])) is None:
+                raise NotionError(404, "object_not_found", "Could not find page")
+            return page
+        if len(parts) >= 2 and parts[0] == "databases":
+            database = self.pages.get(parts[1])
+            if database is None or database["object"] != "database":
+                raise NotionError(404, "object_not_found", "Could not find database")
+            if method == "GET" and len(parts) == 2:
+                return database
+            if method == "POST" and parts[2:] == ["query"]:
+                return self._query(database, body, query.get("filter_properties"))
+        if len(parts) == 3 and parts[0] == "blocks" and parts[2] == "children":
+            if parts[1] not in self.children:
+                raise NotionError(404, "object_not_found", "Could not find block")
+            if method == "PATCH":
+                validate_children(body.get("children"))
+                results = self._append(parts[1], body["children"], body.get("after"))
+                return {"object": "list", "results": results, "has_more": False}
+            if method == "GET":
+                items = [self.blocks[i] for i in self.children[parts[1]]]
+                return self._paginate(items, query)
+        if len(parts) == 2 and parts[0] == "blocks":
+            if parts[1] not in self.blocks:
+                raise NotionError(404, "object_not_found", "Could not find block")
+            if method == "GET":
+                return self.blocks[parts[1]]
+            if method == "PATCH":
+                return self._update_block(parts[1], body)
+            if method == "DELETE":
+                return self._delete_block(parts[1])
+        raise NotionError(400, "invalid_request_url", "Invalid request URL")
+
+    def _paginate(self, items: List[Dict], options: Dict[str, Any]) -> Dict[str, Any]:
+        start = int(options.get("start_cursor") or 0)
+        size = min(int(options.get("page_size") or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        more = start + size < len(items)
+        return {
+            "object": "list",
+            "results": items[start : start + size],
+            "has_more": more,
+            "next_cursor": str(start + size) if more else None,
+        }
+
+    def _search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        text = (body.get("query") or "").casefold()
+        wanted = (body.get("filter") or {}).get("value")
+        items = [
+            page
+            for page in self.pages.values()
+            if text in self.title_of(page).casefold()
+            and (wanted is None or page["object"] == wanted)
+        ]
+        items.sort(key=lambda page: page["last_edited_time"], reverse=True)
+        return self._paginate(items, body)
+
+    def _matches(self, row: Dict[str, Any], condition: Dict[str, Any]) -> bool:
+        if "and" in condition:
+            return all(self._matches(row, item) for item in condition["and"])
+        if "or" in condition:
+            return any(self._matches(row, item) for item in condition["or"])
+        prop = row["properties"].get(condition.get("property"))
+        if prop is None:
+            raise NotionError(400, "validation_error", "filter property not found")
+        wanted = condition.get(prop["type"], {}).get("equals")
+        value = prop[prop["type"]]
+        if prop["type"] in ("title", "rich_text"):
+            value = "".join(item["plain_text"] for item in value)
+        elif prop["type"] == "select":
+            value = value and value["name"]
+        return value == wanted
+
+    def _query(
+        self,
+        database: Dict[str, Any],
+        body: Dict[str, Any],
+        selected: Optional[List[str]],
+    ) -> Dict[str, Any]:
+        rows = [
+            page
+            for page in self.pages.values()
+            if page["parent"].get("database_id") == database["id"]
+        ]
+        if body.get("filter"):
+            rows = [row for row in rows if self._matches(row, body["filter"])]
+        for sort in reversed(body.get("sorts") or []):
+            def key(row: Dict[str, Any], sort: Dict[str, Any] = sort) -> Tuple:
+                if "timestamp" in sort:
+                    return (1, 0, row[sort["timestamp"]])
+                value = row["properties"][sort["property"]]
+                value = value[value["type"]]
+                if isinstance(value, (int, float)):
+                    return (0, value, "")
+                return (1, 0, json.dumps(value))
+
+            rows.sort(key=key, reverse=sort.get("direction") == "descending")
+        if selected:
+            rows = [
+                {
+                    **row,
+                    "properties": {
+                        name: prop
+                        for name, prop in row["properties"].items()
+                        if prop["id"] in selected
+                    },
+                }
+                for row in rows
+            ]
+        return self._paginate(rows, body)
+
+    def _create_page(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        parent = body.get("parent") or {}
+        parent_type = next(iter(parent), None)
+        if parent_type not in ("page_id", "database_id"):
+            raise NotionError(400, "validation_error", "parent should be defined")
+        if parent[parent_type] not in self.pages:
+            raise NotionError(404, "object_not_found", "Could not find parent")
+        children = body.get("children", [])
+        validate_children(children)
+
+        properties = body.get("properties") or {}
+        title_property = properties.get("title") or properties.get("Name") or {}
+        title = "".join(
+            item.get("text", {}).get("content", "")
+            for item in title_property.get("title", [])
+        )
+        page_id = self._add_page(title, "page", parent[parent_type], parent_type)
+        self._append(page_id, children)
+        if parent_type == "page_id":
+            # Subpages show up among their parent's blocks, under the page's ID
+            self.blocks[page_id] = {
+                "object": "block",
+                "id": page_id,
+                "type": "child_page",
+                "has_children": bool(children),
+                "child_page": {"title": title},
+            }
+            self.children[parent[parent_type]].append(page_id)
+            self.parents[page_id] = parent[parent_type]
+            if parent[parent_type] in self.blocks:
+                self.blocks[parent[parent_type]]["has_children"] = True
+        return self.pages[page_id]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send each response as soon as it is written, without waiting for ACKs
+    disable_nagle_algorithm = True
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = None
+        token = self.headers.get("Authorization", "")
+
+        if body is None:
+            status, payload, headers = 400, {"code": "invalid_json"}, {}
+        else:
+            status, payload, headers = self.server.notion.handle(
+                self.command, self.path, token, body
+            )
+        if status is None:
+            self.close_connection = True
+            return
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request, e.g. a hedged read's loser
+            self.close_connection = True
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=None)
+    args = parser.parse_args()
+
+    server = FakeNotion(
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate=args.rate,
+    )
+    server.seed(args.pages)
+    print(f"Serving {args.pages} pages at {server.url}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
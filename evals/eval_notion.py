@@ -8,14 +8,22 @@ from arcade.sdk.eval import (
 from arcade.sdk import ToolCatalog
 from arcade_notion.tools import (
     create_page_by_parent_title,
+    create_pages_by_parent_title,
     create_subpage,
     get_page_id,
+    query_database_by_title,
+    read_page_by_title,
+    update_page_by_title,
 )
 
 catalog = ToolCatalog()
 catalog.add_tool(create_page_by_parent_title, "Notion")
+catalog.add_tool(create_pages_by_parent_title, "Notion")
 catalog.add_tool(create_subpage, "Notion")
 catalog.add_tool(get_page_id, "Notion")
+catalog.add_tool(update_page_by_title, "Notion")
+catalog.add_tool(read_page_by_title, "Notion")
+catalog.add_tool(query_database_by_title, "Notion")
 
 rubric = EvalRubric(
     fail_threshold=0.85,
@@ -57,6 +65,81 @@ def notion_eval_suite() -> EvalSuite:
         ],
     )
 
+    # Creating several pages at once by parent title
+    suite.add_case(
+        name="Create several pages using parent title",
+        user_message="Under my Tickets page, create one page per ticket: 'TICKET-101' with the content 'Login fails on Safari' and 'TICKET-102' with the content 'Export times out'",
+        expected_tool_calls=[
+            (
+                create_pages_by_parent_title,
+                {
+                    "parent_title": "Tickets",
+                    "pages": [
+                        {"title": "TICKET-101", "content": "Login fails on Safari"},
+                        {"title": "TICKET-102", "content": "Export times out"},
+                    ],
+                },
+            )
+        ],
+        critics=[
+            BinaryCritic(critic_field="parent_title", weight=0.4),
+            SimilarityCritic(
+                critic_field="pages", weight=0.6, similarity_threshold=0.9
+            ),
+        ],
+    )
+
+    # Updating an existing page's content
+    suite.add_case(
+        name="Update page content by title",
+        user_message="Replace the content of my Release Checklist page with '- Tag the release\n- Publish the changelog'",
+        expected_tool_calls=[
+            (
+                update_page_by_title,
+                {
+                    "title": "Release Checklist",
+                    "content": "- Tag the release\n- Publish the changelog",
+                },
+            )
+        ],
+        critics=[
+            BinaryCritic(critic_field="title", weight=0.5),
+            SimilarityCritic(
+                critic_field="content", weight=0.5, similarity_threshold=0.95
+            ),
+        ],
+    )
+
+    # Reading a page's content
+    suite.add_case(
+        name="Summarize an existing page",
+        user_message="Summarize my Q3 Planning page in Notion",
+        expected_tool_calls=[(read_page_by_title, {"title": "Q3 Planning"})],
+        critics=[
+            BinaryCritic(critic_field="title", weight=1.0),
+        ],
+    )
+
+    # Querying a database
+    suite.add_case(
+        name="Query database with filter",
+        user_message="List the names of the tasks marked Done in my Sprint Tasks database",
+        expected_tool_calls=[
+            (
+                query_database_by_title,
+                {
+                    "title": "Sprint Tasks",
+                    "filter": {"property": "Status", "status": {"equals": "Done"}},
+                    "properties": ["Name"],
+                },
+            )
+        ],
+        critics=[
+            BinaryCritic(critic_field="title", weight=0.6),
+            SimilarityCritic(critic_field="filter", weight=0.4),
+        ],
+    )
+
     # Getting page ID
     suite.add_case(
         name="Get page ID",
@@ -0,0 +1,177 @@
+"""
+Resuming interrupted directory imports, against the offline stand-in.
+
+Each case stops an import partway the way a crash or a lost response
+would, runs it again, and checks that every file ended up as exactly one
+page with exactly its blocks: nothing missing and nothing uploaded twice.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from arcade_notion import notion_api
+from arcade_notion.importer import JOURNAL_NAME, import_directory
+from arcade_notion.markdown_processor import parse_markdown
+from arcade_notion.uploader import upload_page
+from benchmarks.bench_suite import make_markdown
+from benchmarks.fake_notion import FakeNotion
+
+TOKEN = "test-token"
+APPENDS = "blocks/[^/]+/children"
+# A long file takes a page creation and several appends, some nested
+FILES = {
+    "long.md": make_markdown(450),
+    "short.md": "# Short\n\nA single paragraph.",
+    "guides/index.md": "All the guides.",
+    "guides/setup.md": make_markdown(60),
+}
+
+
+@pytest.fixture(scope="module")
+def notion():
+    with FakeNotion() as server:
+        notion_api.configure_client(base_url=server.url, rate=10_000, burst=10_000)
+        yield server
+    notion_api.configure_client()
+
+
+def make_wiki(root: Path, files: Dict[str, str]) -> Path:
+    for name, content in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(content, encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def wiki(tmp_path: Path) -> Path:
+    return make_wiki(tmp_path, FILES)
+
+
+def stored_tree(server: FakeNotion, block_id: str) -> List[Any]:
+    """(type, text, children) for each stored child of a block, subpages aside."""
+    tree = []
+    for child_id in server.children[block_id]:
+        block = server.blocks[child_id]
+        if block["type"] == "child_page":
+            continue
+        content = block[block["type"]]
+        text = "".join(item["plain_text"] for item in content.get("rich_text", []))
+        tree.append((block["type"], text, stored_tree(server, child_id)))
+    return tree
+
+
+def expected_tree(server: FakeNotion, markdown: str) -> List[Any]:
+    scratch = server.add_page("Scratch")
+    result = upload_page(TOKEN, {"page_id": scratch}, {}, parse_markdown(markdown))
+    assert result.success, result.message
+    return stored_tree(server, result.data["id"])
+
+
+def assert_imported_once(
+    server: FakeNotion, page_id: str, files: Dict[str, str]
+) -> None:
+    """Each file and directory is one subpage holding exactly its content."""
+    directories: Dict[str, Dict[str, str]] = {}
+    pages: Dict[str, str] = {}
+    for name, content in files.items():
+        directory, _, rest = name.partition("/")
+        if rest:
+            directories.setdefault(directory, {})[rest] = content
+        else:
+            pages[Path(name).stem] = content
+
+    subpages: Dict[str, List[str]] = {}
+    for child_id in server.children[page_id]:
+        block = server.blocks[child_id]
+        if block["type"] == "child_page":
+            subpages.setdefault(block["child_page"]["title"], []).append(child_id)
+    assert {title: len(ids) for title, ids in subpages.items()} == {
+        title: 1 for title in [*pages, *directories]
+    }
+
+    for title, content in pages.items():
+        assert stored_tree(server, subpages[title][0]) == expected_tree(
+            server, content
+        )
+    for title, contents in directories.items():
+        (directory_id,) = subpages[title]
+        index = contents.pop("index.md", "")
+        assert stored_tree(server, directory_id) == expected_tree(server, index)
+        assert_imported_once(server, directory_id, contents)
+
+
+def run_import(wiki: Path, parent_id: str):
+    return import_directory(TOKEN, str(wiki), parent_id, concurrency=1)
+
+
+def truncate_last_line(journal: Path) -> None:
+    """Cut the journal's last line in half, as a crash while writing it would."""
+    content = journal.read_bytes()
+    start = content.rstrip(b"\n").rfind(b"\n") + 1
+    journal.write_bytes(content[: start + (len(content) - start) // 2])
+
+
+def test_failed_append_resumes_where_it_stopped(notion, wiki):
+    parent_id = notion.add_page("Wiki")
+    notion.fail("PATCH", APPENDS, status=400, applied=False, after=2)
+
+    first = run_import(wiki, parent_id)
+    assert not first.success
+
+    second = run_import(wiki, parent_id)
+    assert second.success, second.message
+    assert second.data["resumed"] == 1
+    assert_imported_once(notion, parent_id, FILES)
+
+
+def test_append_whose_response_was_lost_is_not_sent_again(notion, wiki):
+    parent_id = notion.add_page("Wiki")
+    # Applied, but the connection drops before the answer arrives
+    notion.fail("PATCH", APPENDS, status=None, applied=True, after=2)
+
+    assert not run_import(wiki, parent_id).success
+    assert run_import(wiki, parent_id).success
+    assert_imported_once(notion, parent_id, FILES)
+
+
+def test_page_whose_creation_was_lost_is_found(notion, wiki):
+    parent_id = notion.add_page("Wiki")
+    notion.fail("POST", "pages", status=None, applied=True, after=1)
+
+    assert not run_import(wiki, parent_id).success
+    second = run_import(wiki, parent_id)
+    assert second.success, second.message
+    assert_imported_once(notion, parent_id, FILES)
+
+
+def test_request_record_cut_short_by_a_crash(notion, tmp_path):
+    # One file, so the crash can come right after its request landed
+    files = {"long.md": FILES["long.md"]}
+    wiki = make_wiki(tmp_path, files)
+    parent_id = notion.add_page("Wiki")
+    # Stands in for the crash: the append after the cut record never goes out
+    notion.fail("PATCH", APPENDS, status=400, applied=False, after=2)
+    assert not run_import(wiki, parent_id).success
+    journal = wiki / JOURNAL_NAME
+    assert b'"request":2' in journal.read_bytes().splitlines()[-1]
+    truncate_last_line(journal)
+
+    second = run_import(wiki, parent_id)
+    assert second.success, second.message
+    assert second.data["resumed"] == 1
+    assert_imported_once(notion, parent_id, files)
+
+
+def test_done_record_cut_short_by_a_crash(notion, wiki):
+    parent_id = notion.add_page("Wiki")
+    assert run_import(wiki, parent_id).success
+    journal = wiki / JOURNAL_NAME
+    assert b'"done"' in journal.read_bytes().splitlines()[-1]
+    truncate_last_line(journal)
+
+    second = run_import(wiki, parent_id)
+    assert second.success, second.message
+    assert second.data["skipped"] == len(FILES) - 1
+    assert_imported_once(notion, parent_id, FILES)
@@ -0,0 +1,116 @@
+"""
+Retry policy of the Notion clients, checked against the offline stand-in.
+
+Reads are retried on 5xx and dropped connections. Writes Notion may already
+have applied are not, since sending them again would duplicate pages or
+blocks; they are only retried on a 429.
+"""
+
+import asyncio
+
+import pytest
+
+from arcade_notion import notion_api
+from benchmarks.fake_notion import FakeNotion
+
+TOKEN = "test-token"
+
+
+@pytest.fixture(scope="module")
+def notion():
+    with FakeNotion() as server:
+        notion_api.configure_client(base_url=server.url, rate=1000, burst=1000)
+        yield server
+    notion_api.configure_client()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """No waiting between retries."""
+    monkeypatch.setattr(notion_api, "BACKOFF_BASE", 0.0)
+
+
+def create_page(parent_id: str, use_async: bool):
+    body = {
+        "parent": {"page_id": parent_id},
+        "properties": {"title": {"title": [{"text": {"content": "New"}}]}},
+    }
+    if use_async:
+        return asyncio.run(notion_api.post_request_async("pages", TOKEN, body))
+    return notion_api.post_request("pages", TOKEN, body)
+
+
+def subpages(server: FakeNotion, parent_id: str) -> int:
+    return len(server.children[parent_id])
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize("status", [500, 503, None])
+def test_failed_write_is_not_sent_twice(notion, use_async, status):
+    parent_id = notion.add_page("Parent")
+    notion.fail("POST", "pages", status=status)
+
+    result = create_page(parent_id, use_async)
+
+    assert result["error"]
+    assert result["meta"]["attempts"] == 1
+    assert subpages(notion, parent_id) == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_rate_limited_write_is_retried(notion, use_async):
+    parent_id = notion.add_page("Parent")
+    notion.fail("POST", "pages", status=429, applied=False)
+
+    result = create_page(parent_id, use_async)
+
+    assert result["error"] is None
+    assert result["meta"]["attempts"] == 2
+    assert subpages(notion, parent_id) == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize("status", [502, None])
+def test_failed_read_is_retried(notion, use_async, status):
+    page_id = notion.add_page("Parent")
+    notion.fail("GET", f"pages/{page_id}", status=status)
+
+    if use_async:
+        result = asyncio.run(notion_api.get_request_async(f"pages/{page_id}", TOKEN))
+    else:
+        result = notion_api.get_request(f"pages/{page_id}", TOKEN)
+
+    assert result["error"] is None
+    assert result["meta"]["attempts"] == 2
+    assert result["data"]["id"] == page_id
+
+
+def test_sessions_and_buckets_are_bounded(notion, monkeypatch):
+    monkeypatch.setattr(notion_api, "MAX_TOKENS", 2)
+    client = notion_api.NotionClient(base_url=notion.url)
+    closed = []
+    first = client._session("token-0")
+    monkeypatch.setattr(first, "close", lambda: closed.append(first))
+    for i in range(1, 3):
+        client._session(f"token-{i}")
+    buckets = [client.bucket(f"token-{i}") for i in range(3)]
+
+    assert len(client._sessions.values()) == len(client._buckets.values()) == 2
+    # The least recently used token's session was closed when evicted
+    assert closed == [first]
+    assert client.bucket("token-2") is buckets[2]
+    client.close()
+
+
+def test_evicted_async_clients_are_closed(notion, monkeypatch):
+    monkeypatch.setattr(notion_api, "MAX_TOKENS", 2)
+    client = notion_api.AsyncNotionClient(base_url=notion.url)
+
+    async def open_sessions():
+        sessions = [client._session(f"token-{i}") for i in range(3)]
+        await asyncio.sleep(0)
+        closed = [session.is_closed for session in sessions]
+        await client.aclose()
+        return closed
+
+    assert asyncio.run(open_sessions()) == [True, False, False]
@@ -0,0 +1,84 @@
+"""Page lookups, creation and reads through the services, against the stand-in."""
+
+import asyncio
+
+import pytest
+from arcade.core.schema import ToolAuthorizationContext
+from arcade.sdk import ToolContext
+
+from arcade_notion import index, notion_api, services
+from arcade_notion.tools import read_page_by_title
+from benchmarks.fake_notion import FakeNotion
+
+TOKEN = "test-token"
+CONTEXT = ToolContext(authorization=ToolAuthorizationContext(token=TOKEN))
+
+
+@pytest.fixture
+def notion():
+    with FakeNotion() as server:
+        notion_api.configure_client(base_url=server.url, rate=1000, burst=1000)
+        services.title_cache.clear()
+        yield server
+    notion_api.configure_client()
+
+
+@pytest.fixture
+def title_index(tmp_path):
+    yield index.configure_title_index(str(tmp_path / "titles.db"))
+    index.configure_title_index(None)
+
+
+def refresh(title_index: index.TitleIndex) -> None:
+    pages = services.search_pages(
+        TOKEN, page_size=services.MAX_PAGE_SIZE, max_requests=None, max_seconds=None
+    )
+    assert asyncio.run(title_index.refresh(TOKEN, pages))
+
+
+def searches(server: FakeNotion) -> int:
+    return sum(path.endswith("/search") for _, path, _ in server.calls)
+
+
+def test_exact_title_in_index_skips_search(notion, title_index):
+    page_id = notion.add_page("Team Updates")
+    refresh(title_index)
+    notion.reset_calls()
+
+    result = services.find_page_id(CONTEXT, "Team Updates")
+
+    assert result.data["id"] == page_id
+    assert searches(notion) == 0
+
+
+def test_partial_index_match_falls_back_to_search(notion, title_index):
+    notion.add_page("Team Updates archive")
+    refresh(title_index)
+    # Created by another worker after the index was refreshed
+    page_id = notion.add_page("Team Updates")
+
+    result = services.find_page_id(CONTEXT, "Team Updates")
+
+    assert result.data["match_type"] == "exact match"
+    assert result.data["id"] == page_id
+
+
+def test_read_page_names_the_page_it_read(notion):
+    notion.add_page("Q3 Planning notes")
+
+    content = asyncio.run(read_page_by_title(CONTEXT, "Q3 Planning"))
+
+    assert content.startswith("Page 'Q3 Planning notes' (similar match):")
+
+
+def test_created_page_outranks_older_page_with_the_same_title(notion):
+    parent_id = notion.add_page("Notes")
+    notion.add_page("Weekly Notes")
+    assert services.find_page_id(CONTEXT, "Weekly Notes").success
+
+    created = services.create_page_with_parent(
+        CONTEXT, "Weekly Notes", "Agenda", parent_id
+    )
+    result = services.find_page_id(CONTEXT, "Weekly Notes")
+
+    assert result.data["id"] == created.data["id"]
@@ -0,0 +1,104 @@
+"""
+Randomized edits through update_page, checked against the offline stand-in.
+
+Each case uploads a random document, rewrites it twice with update_page and
+compares what the stand-in then stores with a fresh upload of the final
+markdown. The second rewrite reads back a tree the first one changed, so it
+relies on has_children being kept up to date.
+"""
+
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from arcade_notion import notion_api
+from arcade_notion.markdown_processor import parse_markdown
+from arcade_notion.updater import update_page
+from arcade_notion.uploader import upload_page
+from benchmarks.fake_notion import FakeNotion
+
+TOKEN = "test-token"
+LINES = [
+    "# Title",
+    "## Section",
+    "Paragraph",
+    "- Item",
+    "  - Nested item",
+    "    - Deeper item",
+    "1. Step",
+    "> Quote",
+    "---",
+    "Text with **bold**",
+]
+SEEDS = range(60)
+
+
+@pytest.fixture(scope="module")
+def notion():
+    with FakeNotion() as server:
+        notion_api.configure_client(base_url=server.url, rate=10_000, burst=10_000)
+        yield server
+    notion_api.configure_client()
+
+
+def random_document(rng: random.Random) -> str:
+    return "\n".join(
+        f"{rng.choice(LINES)} {rng.randrange(5)}" for _ in range(rng.randrange(40))
+    )
+
+
+def edit_document(rng: random.Random, markdown: str) -> str:
+    """Drop some lines and add one, or every third time start over."""
+    if rng.randrange(3) == 0:
+        return random_document(rng)
+    kept = [line for line in markdown.splitlines() if rng.random() > 0.2]
+    return "\n".join(kept + [f"{rng.choice(LINES)} {rng.randrange(5)}"])
+
+
+def stored_tree(server: FakeNotion, block_id: str) -> List[Any]:
+    """(type, text, children) for each stored child of a block."""
+    tree = []
+    for child_id in server.children[block_id]:
+        block = server.blocks[child_id]
+        content = block[block["type"]]
+        text = "".join(item["plain_text"] for item in content.get("rich_text", []))
+        tree.append((block["type"], text, stored_tree(server, child_id)))
+    return tree
+
+
+def upload(server: FakeNotion, parent_id: str, markdown: str) -> str:
+    result = upload_page(TOKEN, {"page_id": parent_id}, {}, parse_markdown(markdown))
+    assert result.success, result.message
+    return result.data["id"]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_update_matches_fresh_upload(notion: FakeNotion, seed: int):
+    rng = random.Random(seed)
+    parent_id = notion.add_page(f"Fuzz {seed}")
+    markdown = random_document(rng)
+    page_id = upload(notion, parent_id, markdown)
+
+    for _ in range(2):
+        markdown = edit_document(rng, markdown)
+        result = update_page(TOKEN, page_id, parse_markdown(markdown))
+        assert result.success, result.message
+        assert result.data["complete"]
+
+    expected = stored_tree(notion, upload(notion, parent_id, markdown))
+    assert stored_tree(notion, page_id) == expected
+
+
+def test_has_children_follows_appends_and_deletes(notion: FakeNotion):
+    page_id = upload(notion, notion.add_page("Nesting"), "- Item\n  - Nested item")
+    (item_id,) = notion.children[page_id]
+    item: Dict[str, Any] = notion.blocks[item_id]
+    assert item["has_children"]
+
+    update_page(TOKEN, page_id, parse_markdown("- Item"))
+    assert notion.children[page_id] == [item_id]
+    assert not item["has_children"]
+
+    update_page(TOKEN, page_id, parse_markdown("- Item\n  - Nested again"))
+    assert item["has_children"]